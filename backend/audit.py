@@ -1,10 +1,139 @@
-AUDIT_LOG = []
+import os
+import asyncio
+import threading
+from collections import deque
+
+try:
+    from .batcher import QueueWorker
+    from .compat import json_dumps, model_dump
+except ImportError:  # imported from inside backend/ (main.py style)
+    from batcher import QueueWorker
+    from compat import json_dumps, model_dump
+
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "data")
+AUDIT_FILE = os.path.join(DATA_DIR, "audit_log.ndjson")
+AUDIT_RING_SIZE = 1000  # Recent records kept in memory for get_audit_log
+SAVED_AUDIT_FILE = os.path.join(DATA_DIR, "saved_audits.ndjson")  # Records posted to /audit
+
+# Fields persisted per record. Decision.explanation is left out: it is
+# derived text, reproducible from the transaction, final_risk and action.
+TX_FIELDS = {"amount", "location_distance_km", "is_new_device", "hour"}
+DEC_FIELDS = {"transaction_risk", "behavioral_risk", "final_risk", "action"}
+
+AUDIT_LOG = deque(maxlen=AUDIT_RING_SIZE)
+_lock = threading.Lock()
+
+os.makedirs(DATA_DIR, exist_ok=True)
+_audit_file = open(AUDIT_FILE, "ab")
 
 def log_decision(tx, decision):
-    AUDIT_LOG.append({
-        "transaction": tx.dict(),
-        "decision": decision.dict()
-    })
+    record = {
+        "transaction": model_dump(tx, TX_FIELDS),
+        "decision": model_dump(decision, DEC_FIELDS)
+    }
+    line = json_dumps(record) + b"\n"
+    with _lock:
+        _audit_file.write(line)
+        _audit_file.flush()
+        AUDIT_LOG.append(record)
+
+def get_audit_log(limit=AUDIT_RING_SIZE):
+    with _lock:
+        records = list(AUDIT_LOG)
+    return records[-limit:]
+
+class AuditWriter(QueueWorker):
+    """Buffers posted audit records and appends them to an NDJSON file in batches"""
+
+    def __init__(self, path=SAVED_AUDIT_FILE, max_pending=10_000, max_batch=256):
+        super().__init__(maxsize=max_pending)  # put() waits once this many records are unwritten
+        self.path = path
+        self.max_batch = max_batch
+        self.total = self._count_lines()
+        self._queued = 0   # records put since start
+        self._done = 0     # records taken off the queue and written (or dropped)
+        self._waiters = []  # (records queued when flush was called, future)
+
+    def _count_lines(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for _ in f)
+
+    def start(self):
+        super().start()
+        # A worker that dies must not leave flush() callers waiting forever
+        self._worker.add_done_callback(lambda _: self._wake(release_all=True))
+
+    async def _before_stop(self):
+        await self.flush()
+
+    async def put(self, record):
+        await self._queue.put(record)
+        self._queued += 1
+        self.total += 1
+        return self.total
+
+    async def flush(self):
+        """Wait until the records queued so far are on disk; later ones are not waited for"""
+        if self._done >= self._queued:
+            return
+        if not self.running:
+            print("⚠️ Audit writer is not running;", self._queued - self._done, "records unwritten")
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((self._queued, future))
+        await future
+
+    def _wake(self, release_all=False):
+        waiting = []
+        for target, future in self._waiters:
+            if future.done():
+                continue
+            if release_all or target <= self._done:
+                future.set_result(None)
+            else:
+                waiting.append((target, future))
+        self._waiters = waiting
+
+    def _append(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                lines = []
+                for record in batch:
+                    try:
+                        lines.append(json_dumps(record) + b"\n")
+                    except (TypeError, ValueError) as e:
+                        print("⚠️ Audit record dropped, not JSON-encodable:", e)
+                if lines:
+                    await asyncio.to_thread(self._append, b"".join(lines))
+            except OSError as e:
+                print("⚠️ Audit write failed:", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                self._done += len(batch)
+                self._wake()
 
-def get_audit_log():
-    return AUDIT_LOG
+    def iter_json_array(self):
+        """Yield the saved records as one JSON array, a line at a time"""
+        yield b"["
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                first = True
+                for line in f:
+                    line = line.rstrip(b"\n")
+                    if not line:
+                        continue
+                    yield line if first else b"," + line
+                    first = False
+        yield b"]"
@@ -0,0 +1,117 @@
+"""
+TRACE BANK - MICRO-BATCHING
+Coalesces concurrent scoring requests that arrive within a few milliseconds
+and scores them with a single batch call
+"""
+
+import asyncio
+from typing import Any, Callable, List
+
+class QueueWorker:
+    """An asyncio.Queue drained by one background task; subclasses implement _run"""
+
+    def __init__(self, maxsize: int = 0):
+        self._maxsize = maxsize
+        self._queue = None
+        self._worker = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the worker task; call from the app's lifespan"""
+        self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Run _before_stop, cancel the worker, then _after_stop"""
+        if self._worker is None:
+            return
+        await self._before_stop()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"⚠️ {type(self).__name__} worker had failed:", e)
+        self._worker = None
+        self._after_stop()
+
+    async def _before_stop(self):
+        pass
+
+    def _after_stop(self):
+        pass
+
+    async def _run(self):
+        raise NotImplementedError
+
+class MicroBatcher(QueueWorker):
+    """Queue-backed batcher: submit() one item, batch_fn scores many at once"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch: int = 64, max_wait: float = 0.003):
+        super().__init__()
+        self.batch_fn = batch_fn  # list of items -> list of results, same order
+        self.max_batch = max_batch
+        self.max_wait = max_wait  # seconds to wait for more items after the first
+
+    def _after_stop(self):
+        # Fail every request still waiting on a batch
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("batcher stopped"))
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _next_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    def _score(self, batch: list):
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # One bad item must not fail its neighbours: score each on its own
+            for entry in batch:
+                self._score([entry])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run(self):
+        while True:
+            batch = []
+            try:
+                await self._next_batch(batch)
+            except asyncio.CancelledError:
+                # Items already taken off the queue would otherwise wait forever
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("batcher stopped"))
+                raise
+            self._score(batch)
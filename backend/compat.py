@@ -0,0 +1,41 @@
+"""
+TRACE BANK - COMPAT HELPERS
+Optional-dependency fallbacks shared by the backend: orjson vs stdlib json,
+pydantic v2 vs v1 model dumping
+"""
+
+import json
+from datetime import date, datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj):
+    # What orjson encodes natively but stdlib json does not
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):  # numpy scalars and arrays
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def json_dumps(obj, sort_keys: bool = False) -> bytes:
+    """Compact JSON bytes; orjson when available, stdlib json for anything it rejects"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which stdlib json handles
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False, default=_default
+    ).encode()
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+def model_dump(model, include=None):
+    # pydantic v2 exposes model_dump; v1 only has dict()
+    if hasattr(model, "model_dump"):
+        return model.model_dump(include=include, mode="python")
+    return model.dict(include=include)
@@ -4,13 +4,176 @@ ML-powered "what if" scenarios with user-friendly explanations
 """
 
 from typing import Dict, List
+from functools import lru_cache
+from operator import itemgetter
+import heapq
 import random
+import numpy as np
+
+# =============== BANK VIEW TEMPLATES ===============
+# Built once at import; only the numeric fields are substituted per decline.
+
+_AMOUNT_EXPLANATION_TPL = """AMOUNT ANOMALY DETECTION:
+- Current Amount: {current:,.0f} INR
+- Historical Average: {average:,.0f} INR ({ratio:.2f}x baseline)
+- 95th Percentile Threshold: {optimal:,.0f} INR
+- Deviation: {deviation:.1f}% above typical spending
+- Risk Score Contribution: {risk}/50 points
+
+MODEL REASONING:
+- XGBoost Regressor detects amount as primary fraud indicator
+- Training data shows {deviation:.0f}% increase triggers fraud in {trigger_rate}% of similar cases
+- Historical user baseline learning: Established from last {history_len} transactions
+- Anomaly ratio = {ratio:.2f}x (threshold = 1.5x)
+
+WHY THIS MATTERS:
+- Large transactions are fraud risk as they cause immediate customer impact
+- Users typically maintain consistent spending patterns
+- Sudden large purchases often indicate account compromise or fraud ring activity
+- Amount-based anomaly has 94% true positive rate in fraud detection"""
+
+_AMOUNT_CURRENT_TPL = "Amount: {current:,.0f} INR | Risk Factor: {risk:.1f} points | Anomaly: {deviation:.1f}% above average"
+_AMOUNT_SUGGESTED_TPL = "Reduce to {optimal:,.0f} INR (within 95th percentile) OR split into multiple smaller transactions of {split:,.0f} INR each"
+
+_LOCATION_EXPLANATION_TPL = """VPN/GEOLOCATION ANOMALY DETECTION:
+- Device Location: {location}
+- GPS Match with History: 34% (threshold: 70%)
+- VPN/Proxy Detection: XGBoost model score = 0.72/1.0
+- Risk Score Contribution: {risk}/25 points
+
+MODEL REASONING:
+- XGBoost VPN Detection Model trained on 50,000+ legitimate vs VPN transactions
+- Detection features: IP geolocation variance, DNS leaks, MTU size anomalies, TTL patterns
+- VPN transactions show 87% higher fraud correlation than normal transactions
+- Device has 0 previous transactions from this location
+
+FRAUD PATTERN ANALYSIS:
+- VPN usage indicates either privacy concern (legitimate) or location spoofing (fraud)
+- Fraud rings commonly use VPN to appear in legitimate user locations
+- 78% of fraud ring transactions detected via VPN inconsistency
+- Location variance + device mismatch = 0.89 fraud probability
+
+WHY THIS MATTERS:
+- Fraudsters use VPNs to obscure their true location
+- Legitimate users rarely change location without notice
+- Combined location + behavior signals are highly predictive of compromise"""
+
+_LOCATION_CURRENT_TPL = "Connection Type: {connection} | Location Variance: High | Device History Match: Low (34%)"
+_LOCATION_SUGGESTED = "Disable VPN/Proxy and retry from typical location OR verify device identity via SMS/email authentication"
+
+_BEHAVIOR_EXPLANATION_TPL = """BEHAVIORAL ANOMALY DETECTION:
+- Isolation Forest Anomaly Score: {anomaly:.2f}/1.0
+- Deviation from Historical Pattern: {deviation:.0f}%
+- Risk Score Contribution: {risk}/15 points
+- Time Context: {time_context}
+
+MODEL REASONING:
+- Isolation Forest trained on 100,000+ user behavior profiles
+- Features: transaction frequency, merchant patterns, time-of-day distribution, device behavior
+- Current behavior distance from baseline: {anomaly:.2f} (threshold: 0.5)
+- User typically transacts in 3-4 merchant categories; current category is novel
+
+PATTERN ANALYSIS:
+- Normal users have consistent transaction patterns within days/weeks
+- Sudden behavior change = {deviation:.0f}% probability of account compromise
+- Fraudsters typically test account with out-of-pattern transactions
+- Pattern matching detected {match_confidence:.0f}% confidence of anomaly
+
+WHY THIS MATTERS:
+- Behavioral patterns are unique to each user (like fingerprints)
+- Fraud typically exhibits behavior completely different from baseline
+- Legitimate users rarely break their established patterns suddenly
+- Pattern learning helps detect account takeover before major damage"""
+
+_BEHAVIOR_CURRENT_TPL = "Behavior Pattern Deviation: {deviation:.0f}% | Anomaly Score: {anomaly:.2f} | Category Risk: {merchant_risk:.1f} points"
+_BEHAVIOR_SUGGESTED = "Use device from typical location during normal hours OR increase transaction frequency over next week to establish new baseline pattern"
+
+_MERCHANT_EXPLANATION_TPL = """MERCHANT CATEGORY RISK DETECTION:
+- Current Merchant Category: {category}
+- Risk Weight: {risk}/15 points
+- Historical Category Match: 0% (user has no prior transactions in this category)
+- Fraud Prevalence in Category: {prevalence:.1f}%
+
+MODEL REASONING:
+- Merchant categories have different fraud rates (gambling: 15%, retail: 2%)
+- XGBoost merchant classifier trained on 1M+ transaction patterns
+- User preference learning: Established from {history_len} historical transactions
+- Novel category + high-risk category = elevated fraud probability
+
+FRAUD PATTERN ANALYSIS:
+- Gambling & cryptocurrency merchants have 8-10x higher fraud rates
+- Fraudsters often test stolen cards on high-margin merchants first
+- Legitimate users rarely jump to high-risk categories suddenly
+- Category anomaly combined with other signals = {fraud_confidence:.0f}% fraud confidence
+
+WHY THIS MATTERS:
+- Merchant type reveals user intent and risk profile
+- High-risk merchants (gambling, adult sites) are fraud hotspots
+- Sudden category switch indicates either account compromise or testing
+- Merchant pattern is strong predictor of fraudster identity"""
+
+_MERCHANT_CURRENT_TPL = "Merchant Category: {category} (High Risk) | Category Risk Component: {risk:.1f} points | Historical Category Match: 0%"
+_MERCHANT_SUGGESTED = "Choose from typical merchant categories: Retail, Groceries, Restaurants OR perform additional identity verification"
+
+_VELOCITY_EXPLANATION_TPL = """TRANSACTION VELOCITY SPIKE DETECTION:
+- Transactions in Last Hour: {recent}
+- User's Average Hourly Velocity: {baseline}
+- Spike Magnitude: {spike:.0f}% above baseline
+- Risk Score Contribution: {risk}/10 points
+
+MODEL REASONING:
+- Velocity scoring based on user's historical transaction frequency
+- XGBoost velocity model detects fraud testing patterns (score: 0.81)
+- Fraudsters typically execute multiple rapid transactions to test card validity
+- Legitimate users maintain steady, predictable transaction rhythm
+
+FRAUD PATTERN ANALYSIS:
+- Fraud rings execute 5-10 test transactions within minutes
+- Each failed transaction gives fraudster feedback on card status
+- Legitimate users rarely spike transactions suddenly
+- Velocity spike + amount anomaly = 0.91 fraud probability
+
+WHY THIS MATTERS:
+- Transaction frequency reveals usage pattern uniqueness
+- Sudden velocity change indicates either automated fraud or account compromise
+- Card testing is primary early-stage fraud indicator
+- Velocity rules stop 42% of fraud attempts before approval"""
+
+_VELOCITY_CURRENT_TPL = "Velocity Score: {risk:.1f}/10 | Recent Transactions: {recent} in last hour | Baseline: {baseline} per hour"
+_VELOCITY_SUGGESTED = "Spread transactions over 2-3 hours OR wait 30 minutes before retry to reduce velocity flag"
+
+_TOTAL_IMPACT_TPL = "Reduces total risk by {reduction:.1f} points (from {before:.1f} to {after:.1f})"
+_COMPONENT_IMPACT_TPL = "Reduces {component} risk by {reduction:.1f} points (from {before:.1f} to {after:.1f})"
+
+# Bank decline sections: (risk component, trigger threshold) in display-tie order
+_BANK_SECTIONS = (
+    ('amount', 5),
+    ('location', 5),
+    ('behavior', 5),
+    ('merchant', 5),
+    ('velocity', 3),
+)
+MAX_BANK_COUNTERFACTUALS = 4
+
+# Fixed customer-view responses, returned by reference; callers must not mutate them
+_APPROVED_CUSTOMER = [{
+    'type': 'approval',
+    'title': 'Transaction Approved',
+    'message': 'Your transaction has been processed successfully.'
+}]
+_CONTACT_SUPPORT = [{
+    'type': 'contact',
+    'title': 'Contact Support',
+    'suggestion': 'Please contact our support team for assistance'
+}]
 
 class CounterfactualEngine:
     """ML-powered counterfactual explanations"""
     
     def __init__(self):
         self.decision_threshold = 60.0  # DECLINED starts at 60+ risk score
+        # Breakdown-only explanations are memoised; results are shared, do not mutate
+        self._cached_explanations = lru_cache(maxsize=4096)(self._explanations_for_breakdown)
     
     def generate_counterfactuals(self, transaction: Dict, 
                                risk_score: float, 
@@ -20,15 +183,25 @@ class CounterfactualEngine:
         Returns tuple: (customer_explanations, bank_explanations)
         """
         
-        if risk_score < self.decision_threshold:
-            customer = self._generate_approval_explanations_customer(transaction, risk_breakdown, risk_score)
-            bank = self._generate_approval_explanations_bank(transaction, risk_breakdown, risk_score)
-        else:
-            customer = self._generate_decline_counterfactuals_customer(transaction, risk_breakdown, user_history, risk_score)
+        declined = risk_score >= self.decision_threshold
+        customer, bank = self._cached_explanations(tuple(risk_breakdown.items()), declined)
+        
+        if declined:
+            # Embeds the exact amount and history figures, so it is never cached
             bank = self._generate_decline_counterfactuals_bank(transaction, risk_breakdown, user_history, risk_score)
         
         return customer, bank
     
+    def _explanations_for_breakdown(self, breakdown_key: tuple, declined: bool) -> tuple:
+        """Explanations that depend only on the risk breakdown: (customer, approval bank or None)"""
+        risk_breakdown = dict(breakdown_key)
+        
+        if declined:
+            return self._generate_decline_counterfactuals_customer({}, risk_breakdown, [], 0.0), None
+        
+        return (self._generate_approval_explanations_customer({}, risk_breakdown, 0.0),
+                self._generate_approval_explanations_bank({}, risk_breakdown, 0.0))
+    
     def _generate_decline_counterfactuals_customer(self, transaction: Dict,
                                                   risk_breakdown: Dict,
                                                   user_history: List,
@@ -57,211 +230,151 @@ class CounterfactualEngine:
                 'suggestion': 'Try again from your usual device or browser'
             })
         
-        return suggestions[:2] if suggestions else [{'type': 'contact', 'title': 'Contact Support', 'suggestion': 'Please contact our support team for assistance'}]
+        return suggestions[:2] if suggestions else _CONTACT_SUPPORT
     
     def _generate_decline_counterfactuals_bank(self, transaction: Dict,
                                               risk_breakdown: Dict,
                                               user_history: List,
                                               risk_score: float) -> List[Dict]:
         """Bank view: DETAILED TECHNICAL explanations with numbers, percentages, dates, ML insights"""
-        counterfactuals = []
-        
-        sorted_risks = sorted(risk_breakdown.items(), key=lambda x: x[1], reverse=True)
-        
-        if risk_breakdown.get('amount', 0) > 5:
-            optimal_amount = self._find_optimal_amount(transaction['amount'], user_history)
-            amount_reduction = ((transaction['amount'] - optimal_amount) / transaction['amount']) * 100
-            avg_historical = sum([t.get('amount', 0) for t in user_history[-10:]]) / max(1, len(user_history[-10:]))
-            
-            # More detailed explanation for black box problem
-            detailed_explanation = f"""
-            AMOUNT ANOMALY DETECTION:
-            - Current Amount: {transaction['amount']:,.0f} INR
-            - Historical Average: {avg_historical:,.0f} INR ({(transaction['amount']/max(avg_historical,1)):.2f}x baseline)
-            - 95th Percentile Threshold: {optimal_amount:,.0f} INR
-            - Deviation: {amount_reduction:.1f}% above typical spending
-            - Risk Score Contribution: {risk_breakdown.get('amount', 0)}/50 points
-            
-            MODEL REASONING:
-            - XGBoost Regressor detects amount as primary fraud indicator
-            - Training data shows {amount_reduction:.0f}% increase triggers fraud in {max(50, min(99, 50 + amount_reduction))}% of similar cases
-            - Historical user baseline learning: Established from last {len(user_history)} transactions
-            - Anomaly ratio = {(transaction['amount'] / max(avg_historical, 1)):.2f}x (threshold = 1.5x)
-            
-            WHY THIS MATTERS:
-            - Large transactions are fraud risk as they cause immediate customer impact
-            - Users typically maintain consistent spending patterns
-            - Sudden large purchases often indicate account compromise or fraud ring activity
-            - Amount-based anomaly has 94% true positive rate in fraud detection
-            """
-            
-            counterfactuals.append({
-                'type': 'amount',
-                'title': 'High-Value Transaction Detected',
-                'explanation': detailed_explanation.strip(),
-                'current': f"Amount: {transaction['amount']:,.0f} INR | Risk Factor: {risk_breakdown.get('amount', 0):.1f} points | Anomaly: {amount_reduction:.1f}% above average",
-                'suggested': f"Reduce to {optimal_amount:,.0f} INR (within 95th percentile) OR split into multiple smaller transactions of {optimal_amount/2:,.0f} INR each",
-                'impact': f"Reduces total risk by {risk_breakdown.get('amount', 0) * 0.7:.1f} points (from {risk_score:.1f} to {max(0, risk_score - risk_breakdown.get('amount', 0) * 0.7):.1f})",
-                'confidence': 95
-            })
-        
-        if risk_breakdown.get('location', 0) > 5:
-            detailed_location_explanation = f"""
-            VPN/GEOLOCATION ANOMALY DETECTION:
-            - Device Location: {transaction.get('location', 'Unknown')}
-            - GPS Match with History: 34% (threshold: 70%)
-            - VPN/Proxy Detection: XGBoost model score = 0.72/1.0
-            - Risk Score Contribution: {risk_breakdown.get('location', 0)}/25 points
-            
-            MODEL REASONING:
-            - XGBoost VPN Detection Model trained on 50,000+ legitimate vs VPN transactions
-            - Detection features: IP geolocation variance, DNS leaks, MTU size anomalies, TTL patterns
-            - VPN transactions show 87% higher fraud correlation than normal transactions
-            - Device has 0 previous transactions from this location
-            
-            FRAUD PATTERN ANALYSIS:
-            - VPN usage indicates either privacy concern (legitimate) or location spoofing (fraud)
-            - Fraud rings commonly use VPN to appear in legitimate user locations
-            - 78% of fraud ring transactions detected via VPN inconsistency
-            - Location variance + device mismatch = 0.89 fraud probability
-            
-            WHY THIS MATTERS:
-            - Fraudsters use VPNs to obscure their true location
-            - Legitimate users rarely change location without notice
-            - Combined location + behavior signals are highly predictive of compromise
-            """
-            
-            counterfactuals.append({
-                'type': 'location',
-                'title': 'VPN/Proxy Detection - Geolocation Risk',
-                'explanation': detailed_location_explanation.strip(),
-                'current': f"Connection Type: {transaction.get('vpn_detected', False) and 'VPN Detected' or 'Normal'} | Location Variance: High | Device History Match: Low (34%)",
-                'suggested': f"Disable VPN/Proxy and retry from typical location OR verify device identity via SMS/email authentication",
-                'impact': f"Reduces location risk by {risk_breakdown.get('location', 0) * 0.8:.1f} points (from {risk_score:.1f} to {max(0, risk_score - risk_breakdown.get('location', 0) * 0.8):.1f})",
-                'confidence': 92
-            })
-        
-        if risk_breakdown.get('behavior', 0) > 5:
-            behavior_score = risk_breakdown.get('behavior', 0)
-            detailed_behavior_explanation = f"""
-            BEHAVIORAL ANOMALY DETECTION:
-            - Isolation Forest Anomaly Score: {min(0.99, behavior_score / 10):.2f}/1.0
-            - Deviation from Historical Pattern: {behavior_score * 10:.0f}%
-            - Risk Score Contribution: {risk_breakdown.get('behavior', 0)}/15 points
-            - Time Context: {transaction.get('time_context', 'NORMAL')}
-            
-            MODEL REASONING:
-            - Isolation Forest trained on 100,000+ user behavior profiles
-            - Features: transaction frequency, merchant patterns, time-of-day distribution, device behavior
-            - Current behavior distance from baseline: {min(0.99, behavior_score / 10):.2f} (threshold: 0.5)
-            - User typically transacts in 3-4 merchant categories; current category is novel
-            
-            PATTERN ANALYSIS:
-            - Normal users have consistent transaction patterns within days/weeks
-            - Sudden behavior change = {(behavior_score * 10):.0f}% probability of account compromise
-            - Fraudsters typically test account with out-of-pattern transactions
-            - Pattern matching detected {(90 - behavior_score * 5):.0f}% confidence of anomaly
-            
-            WHY THIS MATTERS:
-            - Behavioral patterns are unique to each user (like fingerprints)
-            - Fraud typically exhibits behavior completely different from baseline
-            - Legitimate users rarely break their established patterns suddenly
-            - Pattern learning helps detect account takeover before major damage
-            """
-            
-            counterfactuals.append({
-                'type': 'behavior',
-                'title': 'Behavioral Anomaly Detected',
-                'explanation': detailed_behavior_explanation.strip(),
-                'current': f"Behavior Pattern Deviation: {behavior_score * 10:.0f}% | Anomaly Score: {min(0.99, behavior_score / 10):.2f} | Category Risk: {risk_breakdown.get('merchant', 0):.1f} points",
-                'suggested': f"Use device from typical location during normal hours OR increase transaction frequency over next week to establish new baseline pattern",
-                'impact': f"Reduces behavior risk by {behavior_score * 0.6:.1f} points (from {risk_score:.1f} to {max(0, risk_score - behavior_score * 0.6):.1f})",
-                'confidence': 85
-            })
+        builders = {
+            'amount': self._bank_amount_counterfactual,
+            'location': self._bank_location_counterfactual,
+            'behavior': self._bank_behavior_counterfactual,
+            'merchant': self._bank_merchant_counterfactual,
+            'velocity': self._bank_velocity_counterfactual,
+        }
         
-        if risk_breakdown.get('merchant', 0) > 5:
-            detailed_merchant_explanation = f"""
-            MERCHANT CATEGORY RISK DETECTION:
-            - Current Merchant Category: {transaction.get('merchant_category', 'unknown')}
-            - Risk Weight: {risk_breakdown.get('merchant', 0)}/15 points
-            - Historical Category Match: 0% (user has no prior transactions in this category)
-            - Fraud Prevalence in Category: {risk_breakdown.get('merchant', 0) * 15:.1f}%
-            
-            MODEL REASONING:
-            - Merchant categories have different fraud rates (gambling: 15%, retail: 2%)
-            - XGBoost merchant classifier trained on 1M+ transaction patterns
-            - User preference learning: Established from {len(user_history)} historical transactions
-            - Novel category + high-risk category = elevated fraud probability
-            
-            FRAUD PATTERN ANALYSIS:
-            - Gambling & cryptocurrency merchants have 8-10x higher fraud rates
-            - Fraudsters often test stolen cards on high-margin merchants first
-            - Legitimate users rarely jump to high-risk categories suddenly
-            - Category anomaly combined with other signals = {(88 + risk_breakdown.get('merchant', 0) * 2):.0f}% fraud confidence
-            
-            WHY THIS MATTERS:
-            - Merchant type reveals user intent and risk profile
-            - High-risk merchants (gambling, adult sites) are fraud hotspots
-            - Sudden category switch indicates either account compromise or testing
-            - Merchant pattern is strong predictor of fraudster identity
-            """
-            
-            counterfactuals.append({
-                'type': 'merchant',
-                'title': 'High-Risk Merchant Category',
-                'explanation': detailed_merchant_explanation.strip(),
-                'current': f"Merchant Category: {transaction.get('merchant_category', 'unknown')} (High Risk) | Category Risk Component: {risk_breakdown.get('merchant', 0):.1f} points | Historical Category Match: 0%",
-                'suggested': f"Choose from typical merchant categories: Retail, Groceries, Restaurants OR perform additional identity verification",
-                'impact': f"Reduces merchant risk by {risk_breakdown.get('merchant', 0) * 0.6:.1f} points (from {risk_score:.1f} to {max(0, risk_score - risk_breakdown.get('merchant', 0) * 0.6):.1f})",
-                'confidence': 88
-            })
+        triggered = []
+        for component, threshold in _BANK_SECTIONS:
+            component_risk = risk_breakdown.get(component, 0)
+            if component_risk > threshold:
+                triggered.append((component, component_risk))
         
-        if risk_breakdown.get('velocity', 0) > 3:
-            detailed_velocity_explanation = f"""
-            TRANSACTION VELOCITY SPIKE DETECTION:
-            - Transactions in Last Hour: {int(risk_breakdown.get('velocity', 0) * 2)}
-            - User's Average Hourly Velocity: {int(risk_breakdown.get('velocity', 0))}
-            - Spike Magnitude: {risk_breakdown.get('velocity', 0) * 30:.0f}% above baseline
-            - Risk Score Contribution: {risk_breakdown.get('velocity', 0)}/10 points
-            
-            MODEL REASONING:
-            - Velocity scoring based on user's historical transaction frequency
-            - XGBoost velocity model detects fraud testing patterns (score: 0.81)
-            - Fraudsters typically execute multiple rapid transactions to test card validity
-            - Legitimate users maintain steady, predictable transaction rhythm
-            
-            FRAUD PATTERN ANALYSIS:
-            - Fraud rings execute 5-10 test transactions within minutes
-            - Each failed transaction gives fraudster feedback on card status
-            - Legitimate users rarely spike transactions suddenly
-            - Velocity spike + amount anomaly = 0.91 fraud probability
-            
-            WHY THIS MATTERS:
-            - Transaction frequency reveals usage pattern uniqueness
-            - Sudden velocity change indicates either automated fraud or account compromise
-            - Card testing is primary early-stage fraud indicator
-            - Velocity rules stop 42% of fraud attempts before approval
-            """
-            
-            counterfactuals.append({
-                'type': 'velocity',
-                'title': 'Transaction Velocity Spike',
-                'explanation': detailed_velocity_explanation.strip(),
-                'current': f"Velocity Score: {risk_breakdown.get('velocity', 0):.1f}/10 | Recent Transactions: {int(risk_breakdown.get('velocity', 0) * 2)} in last hour | Baseline: {int(risk_breakdown.get('velocity', 0))} per hour",
-                'suggested': f"Spread transactions over 2-3 hours OR wait 30 minutes before retry to reduce velocity flag",
-                'impact': f"Reduces velocity risk by {risk_breakdown.get('velocity', 0) * 0.5:.1f} points (from {risk_score:.1f} to {max(0, risk_score - risk_breakdown.get('velocity', 0) * 0.5):.1f})",
-                'confidence': 79
-            })
+        # Only the top factors are formatted; ties keep section order
+        top = heapq.nlargest(MAX_BANK_COUNTERFACTUALS, triggered, key=itemgetter(1))
+        return [builders[component](transaction, risk_breakdown, user_history, risk_score)
+                for component, _ in top]
+    
+    def _bank_amount_counterfactual(self, transaction: Dict, risk_breakdown: Dict,
+                                    user_history: List, risk_score: float) -> Dict:
+        """Amount anomaly section (fills one values dict for all its templates)"""
+        current_amount = transaction['amount']
+        recent_amounts = self._recent_amounts(user_history)
+        optimal_amount = self._find_optimal_amount(current_amount, recent_amounts)
+        deviation = ((current_amount - optimal_amount) / current_amount) * 100
+        avg_historical = float(recent_amounts.mean()) if recent_amounts.size else 0.0
         
-        return counterfactuals[:4] if counterfactuals else []
+        values = self._impact_values(risk_score, risk_breakdown.get('amount', 0), 0.7)
+        values.update(
+            current=current_amount, average=avg_historical,
+            ratio=current_amount / max(avg_historical, 1),
+            optimal=optimal_amount, split=optimal_amount / 2, deviation=deviation,
+            trigger_rate=max(50, min(99, 50 + deviation)), history_len=len(user_history)
+        )
+        return {
+            'type': 'amount',
+            'title': 'High-Value Transaction Detected',
+            'explanation': _AMOUNT_EXPLANATION_TPL.format_map(values),
+            'current': _AMOUNT_CURRENT_TPL.format_map(values),
+            'suggested': _AMOUNT_SUGGESTED_TPL.format_map(values),
+            'impact': _TOTAL_IMPACT_TPL.format_map(values),
+            'confidence': 95
+        }
+    
+    def _bank_location_counterfactual(self, transaction: Dict, risk_breakdown: Dict,
+                                      user_history: List, risk_score: float) -> Dict:
+        """VPN/geolocation section"""
+        values = self._impact_values(risk_score, risk_breakdown.get('location', 0), 0.8, 'location')
+        values.update(
+            location=transaction.get('location', 'Unknown'),
+            connection='VPN Detected' if transaction.get('vpn_detected', False) else 'Normal'
+        )
+        return {
+            'type': 'location',
+            'title': 'VPN/Proxy Detection - Geolocation Risk',
+            'explanation': _LOCATION_EXPLANATION_TPL.format_map(values),
+            'current': _LOCATION_CURRENT_TPL.format_map(values),
+            'suggested': _LOCATION_SUGGESTED,
+            'impact': _COMPONENT_IMPACT_TPL.format_map(values),
+            'confidence': 92
+        }
+    
+    def _bank_behavior_counterfactual(self, transaction: Dict, risk_breakdown: Dict,
+                                      user_history: List, risk_score: float) -> Dict:
+        """Behavioral anomaly section"""
+        behavior_risk = risk_breakdown.get('behavior', 0)
+        values = self._impact_values(risk_score, behavior_risk, 0.6, 'behavior')
+        values.update(
+            anomaly=min(0.99, behavior_risk / 10), deviation=behavior_risk * 10,
+            match_confidence=90 - behavior_risk * 5,
+            merchant_risk=risk_breakdown.get('merchant', 0),
+            time_context=transaction.get('time_context', 'NORMAL')
+        )
+        return {
+            'type': 'behavior',
+            'title': 'Behavioral Anomaly Detected',
+            'explanation': _BEHAVIOR_EXPLANATION_TPL.format_map(values),
+            'current': _BEHAVIOR_CURRENT_TPL.format_map(values),
+            'suggested': _BEHAVIOR_SUGGESTED,
+            'impact': _COMPONENT_IMPACT_TPL.format_map(values),
+            'confidence': 85
+        }
+    
+    def _bank_merchant_counterfactual(self, transaction: Dict, risk_breakdown: Dict,
+                                      user_history: List, risk_score: float) -> Dict:
+        """Merchant category section"""
+        merchant_risk = risk_breakdown.get('merchant', 0)
+        values = self._impact_values(risk_score, merchant_risk, 0.6, 'merchant')
+        values.update(
+            category=transaction.get('merchant_category', 'unknown'),
+            prevalence=merchant_risk * 15, history_len=len(user_history),
+            fraud_confidence=88 + merchant_risk * 2
+        )
+        return {
+            'type': 'merchant',
+            'title': 'High-Risk Merchant Category',
+            'explanation': _MERCHANT_EXPLANATION_TPL.format_map(values),
+            'current': _MERCHANT_CURRENT_TPL.format_map(values),
+            'suggested': _MERCHANT_SUGGESTED,
+            'impact': _COMPONENT_IMPACT_TPL.format_map(values),
+            'confidence': 88
+        }
+    
+    def _bank_velocity_counterfactual(self, transaction: Dict, risk_breakdown: Dict,
+                                      user_history: List, risk_score: float) -> Dict:
+        """Velocity spike section"""
+        velocity_risk = risk_breakdown.get('velocity', 0)
+        values = self._impact_values(risk_score, velocity_risk, 0.5, 'velocity')
+        values.update(
+            recent=int(velocity_risk * 2), baseline=int(velocity_risk),
+            spike=velocity_risk * 30
+        )
+        return {
+            'type': 'velocity',
+            'title': 'Transaction Velocity Spike',
+            'explanation': _VELOCITY_EXPLANATION_TPL.format_map(values),
+            'current': _VELOCITY_CURRENT_TPL.format_map(values),
+            'suggested': _VELOCITY_SUGGESTED,
+            'impact': _COMPONENT_IMPACT_TPL.format_map(values),
+            'confidence': 79
+        }
+    
+    def _impact_values(self, risk_score: float, component_risk: float,
+                       factor: float, component: str = 'total') -> Dict:
+        """Template values shared by every section: its risk and the projected reduction"""
+        reduction = component_risk * factor
+        return {
+            'component': component,
+            'risk': component_risk,
+            'reduction': reduction,
+            'before': risk_score,
+            'after': max(0, risk_score - reduction)
+        }
     
     def _generate_approval_explanations_customer(self, transaction: Dict, risk_breakdown: Dict, risk_score: float) -> List[Dict]:
         """Customer view: Simple approval message"""
-        return [{
-            'type': 'approval',
-            'title': 'Transaction Approved',
-            'message': 'Your transaction has been processed successfully.'
-        }]
+        return _APPROVED_CUSTOMER
     
     def _generate_approval_explanations_bank(self, transaction: Dict, risk_breakdown: Dict, risk_score: float) -> List[Dict]:
         """Bank view: Detailed approval analysis"""
@@ -295,18 +408,31 @@ class CounterfactualEngine:
             'message': 'Transaction processed successfully.'
         }]
     
-    def _find_optimal_amount(self, current_amount: float, user_history: List) -> float:
-        """Calculate a safe spending amount based on user history"""
-        if not user_history or len(user_history) == 0:
+    def _recent_amounts(self, user_history: List) -> np.ndarray:
+        """Amounts of the last 10 transactions as a float64 array"""
+        recent = user_history[-10:]
+        return np.fromiter((t.get('amount', 0) for t in recent), dtype=np.float64, count=len(recent))
+    
+    def _find_optimal_amount(self, current_amount: float, recent_amounts: np.ndarray) -> float:
+        """Calculate a safe spending amount (95th percentile of recent history)"""
+        if recent_amounts.size == 0:
             return current_amount * 0.5
         
-        amounts = [t.get('amount', 0) for t in user_history[-10:] if t.get('amount', 0) > 0]
-        if amounts:
-            avg_amount = sum(amounts) / len(amounts)
-            return avg_amount * 1.5
+        positive = recent_amounts[recent_amounts > 0]
+        if positive.size:
+            return float(np.percentile(positive, 95))
         else:
             return current_amount * 0.6
     
+    def optimal_amounts(self, history):
+        """Batch _find_optimal_amount over a history DataFrame (user_id, amount columns).
+        Returns the 95th percentile of each user's last 10 positive amounts, indexed by user_id;
+        users without positive amounts are absent and should use the scalar fallback.
+        """
+        recent = history.groupby('user_id', sort=False).tail(10)
+        recent = recent[recent['amount'] > 0]
+        return recent.groupby('user_id')['amount'].quantile(0.95)
+    
     def calculate_churn_impact(self, decision: str, risk_score: float, 
                              user_value: float = 1000.0) -> Dict:
         """Calculate churn risk and business impact"""
@@ -3,33 +3,186 @@ TRACE BANK - REAL-TIME DATA COLLECTION
 No mock data - real tracking where possible
 """
 
+import os
 import random
 import hashlib
+import sqlite3
+import threading
+import queue
+import time
+import ipaddress
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, List
 import socket
 import urllib.request
 import json
+import asyncio
+import numpy as np
+
+# Pooled HTTP client (keep-alive across geolocation lookups); urllib fallback
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+# Parse JSON straight from response bytes; orjson when available
+try:
+    from .compat import json_loads as _json_loads
+except ImportError:  # imported from inside backend/ (main.py style)
+    from compat import json_loads as _json_loads
+
+BEHAVIOR_POOL_SIZE = 8192  # Pre-drawn uniform rows for get_behavior_data
+MAX_USER_BASELINES = 100_000  # LRU bound on per-user behaviour baselines
+MAX_IP_CACHE = 100_000  # LRU bound on in-memory geolocation results
+
+# Bit h set <=> hour h counts as night (22:00-05:59)
+_NIGHT_HOURS = frozenset({22, 23, 0, 1, 2, 3, 4, 5})
+_NIGHT_MASK = sum(1 << h for h in _NIGHT_HOURS)
+
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "data")
+IP_CACHE_FILE = os.path.join(DATA_DIR, "ip_cache.db")
+IP_CACHE_TTL = 30 * 24 * 3600  # Re-resolve an IP after 30 days
+
+# Fallback when geolocation is unavailable; callers get a copy
+_FALLBACK_LOCATION = {
+    'latitude': 19.0760,
+    'longitude': 72.8777,
+    'city': 'Mumbai',
+    'country': 'India',
+    'country_code': 'IN',
+    'timezone': 'IST',
+    'accuracy': 100,
+    'source': 'fallback'
+}
+
+# Wall clock formatted at most once per second: (unix_seconds, datetime, isoformat)
+_clock = (0, None, '')
+_time_context = (0, {})
+
+def _now():
+    """Current (unix_seconds, datetime, isoformat), refreshed when the second changes"""
+    global _clock
+    sec = time.time_ns() // 1_000_000_000
+    if sec != _clock[0]:
+        now = datetime.now()
+        _clock = (sec, now, now.isoformat())
+    return _clock
+
+@lru_cache(maxsize=8192)
+def _is_private_ip(ip_address: str) -> bool:
+    """RFC1918/loopback/link-local addresses cannot be geolocated by a public API"""
+    try:
+        return ipaddress.ip_address(ip_address).is_private
+    except ValueError:
+        return False
+
+@lru_cache(maxsize=100_000)
+def _fingerprint(user_id: str) -> str:
+    """Stable 16-hex-char device fingerprint for a user_id (non-cryptographic use)"""
+    return hashlib.blake2b(user_id.encode(), digest_size=8).hexdigest()
 
 class RealDataTracker:
     """Collect real-time user data automatically"""
     
     def __init__(self):
         # User behavior baselines
-        self.user_baselines = {}
-        self.ip_cache = {}  # Cache IP geolocation results
+        self.user_baselines = OrderedDict()
+        self.ip_cache = OrderedDict()  # Cache IP geolocation results (hot tier above SQLite)
+        self._ip_lock = threading.Lock()  # ip_cache and self._db are shared by _get_ip_location_many's threads
+        self._session = self._create_session()
+        
+        # Uniform draws for behaviour jitter, generated in bulk and handed out row by row
+        self._rng = np.random.default_rng()
+        self._behavior_pool = self._rng.random(size=(BEHAVIOR_POOL_SIZE, 6))
+        self._behavior_idx = 0
+        
+        # Persistent geolocation cache, survives restarts
+        os.makedirs(DATA_DIR, exist_ok=True)
+        self._db = sqlite3.connect(IP_CACHE_FILE, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS ip(ip TEXT PRIMARY KEY, json TEXT, ts REAL)')
+        self._db.commit()
+        self._db_writes = queue.Queue()
+        threading.Thread(target=self._ip_cache_writer, daemon=True).start()
+    
+    @staticmethod
+    def _remember(cache: OrderedDict, key, value, limit: int):
+        """Insert into an LRU-ordered dict, evicting the least recently used entry past limit"""
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > limit:
+            cache.popitem(last=False)
+    
+    def _ip_cache_writer(self):
+        """Drain queued cache rows to SQLite off the request path"""
+        db = sqlite3.connect(IP_CACHE_FILE)
+        while True:
+            row = self._db_writes.get()
+            try:
+                db.execute('INSERT OR REPLACE INTO ip(ip, json, ts) VALUES (?, ?, ?)', row)
+                db.commit()
+            except sqlite3.Error as e:
+                print("IP cache write failed:", e)
+    
+    def _load_cached_location(self, ip_address: str):
+        """Return a fresh persisted location for this IP, or None"""
+        try:
+            with self._ip_lock:
+                row = self._db.execute('SELECT json, ts FROM ip WHERE ip=?', (ip_address,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row and time.time() - row[1] < IP_CACHE_TTL:
+            return json.loads(row[0])
+        return None
+    
+    def _create_session(self):
+        """Shared HTTP session so TCP/TLS connections are reused between lookups"""
+        if requests is None:
+            return None
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=1, backoff_factor=0.1)
+        )
+        session.mount('https://', adapter)
+        return session
+    
+    def _fetch_json(self, url: str) -> Dict:
+        """GET a JSON document through the pooled session (urllib if requests is unavailable)"""
+        if self._session is not None:
+            response = self._session.get(url, timeout=(1, 3))
+            response.raise_for_status()
+            return _json_loads(response.content)
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return _json_loads(response.read())
         
     def _get_ip_location(self, ip_address: str) -> Dict:
         """Get real location from IP address using geolocation API"""
         # Check cache first
-        if ip_address in self.ip_cache:
-            return self.ip_cache[ip_address]
+        with self._ip_lock:
+            location = self.ip_cache.get(ip_address)
+            if location is not None:
+                self.ip_cache.move_to_end(ip_address)
+                return location
+        
+        # Private addresses would only fail at the public API
+        if _is_private_ip(ip_address):
+            return dict(_FALLBACK_LOCATION)
+        
+        location = self._load_cached_location(ip_address)
+        if location is not None:
+            with self._ip_lock:
+                self._remember(self.ip_cache, ip_address, location, MAX_IP_CACHE)
+            return location
         
         try:
             # Use free IP geolocation API
-            url = f"https://ipapi.co/{ip_address}/json/"
-            with urllib.request.urlopen(url, timeout=5) as response:
-                data = json.loads(response.read().decode())
+            data = self._fetch_json(f"https://ipapi.co/{ip_address}/json/")
             
             location = {
                 'latitude': float(data.get('latitude', 0)),
@@ -42,25 +195,25 @@ class RealDataTracker:
                 'source': 'ip_geolocation'
             }
             
-            # Cache the result
-            self.ip_cache[ip_address] = location
+            # Cache the result (in memory now, on disk in the background)
+            with self._ip_lock:
+                self._remember(self.ip_cache, ip_address, location, MAX_IP_CACHE)
+            self._db_writes.put((ip_address, json.dumps(location), time.time()))
             return location
         except Exception as e:
             try:
                 print(f"IP geolocation failed for {ip_address}: {str(e)[:50]}")
             except UnicodeEncodeError:
                 pass
-            # Fallback to random India location
-            return {
-                'latitude': 19.0760 + random.uniform(-1, 1),
-                'longitude': 72.8777 + random.uniform(-1, 1),
-                'city': 'Mumbai',
-                'country': 'India',
-                'country_code': 'IN',
-                'timezone': 'IST',
-                'accuracy': 100,
-                'source': 'fallback'
-            }
+            # Fallback to default India location
+            return dict(_FALLBACK_LOCATION)
+    
+    async def _get_ip_location_many(self, ip_addresses: List[str]) -> List[Dict]:
+        """Resolve several IPs concurrently so their network latency overlaps"""
+        return await asyncio.gather(*(
+            asyncio.to_thread(self._get_ip_location, ip_address)
+            for ip_address in ip_addresses
+        ))
         
     def get_location_data(self, user_id: str, ip_address: str = None) -> Dict:
         """Get real location data from IP address"""
@@ -75,7 +228,7 @@ class RealDataTracker:
             'longitude': location['longitude'],
             'accuracy': location['accuracy'],
             'gps_enabled': random.random() > 0.1,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now()[2],
             'city': location['city'],
             'country': location['country'],
             'country_code': location.get('country_code', ''),
@@ -88,9 +241,8 @@ class RealDataTracker:
         """Get real IP information (public IP if available)"""
         try:
             # Try to get public IP first
-            with urllib.request.urlopen("https://api.ipify.org?format=json", timeout=5) as response:
-                data = json.loads(response.read().decode())
-                ip_address = data.get('ip')
+            data = self._fetch_json("https://api.ipify.org?format=json")
+            ip_address = data.get('ip')
         except:
             try:
                 # Fallback to local IP
@@ -102,36 +254,44 @@ class RealDataTracker:
         return {
             'ip_address': ip_address,
             'is_private': ip_address.startswith(('192.168.', '10.', '172.')),
-            'detected_at': datetime.now().isoformat()
+            'detected_at': _now()[2]
         }
     
     def get_behavior_data(self, user_id: str) -> Dict:
         """Get real behavioral biometrics"""
         # Initialize user baseline if not exists
-        if user_id not in self.user_baselines:
-            self.user_baselines[user_id] = {
+        baseline = self.user_baselines.get(user_id)
+        if baseline is None:
+            baseline = {
                 'typing_speed': random.uniform(40, 80),
                 'mouse_consistency': random.uniform(70, 95),
                 'typical_session': random.uniform(120, 600)
             }
+            self._remember(self.user_baselines, user_id, baseline, MAX_USER_BASELINES)
+        else:
+            self.user_baselines.move_to_end(user_id)
         
-        baseline = self.user_baselines[user_id]
+        if self._behavior_idx >= BEHAVIOR_POOL_SIZE:
+            self._behavior_pool = self._rng.random(size=(BEHAVIOR_POOL_SIZE, 6))
+            self._behavior_idx = 0
+        u = self._behavior_pool[self._behavior_idx].tolist()
+        self._behavior_idx += 1
         
-        # Simulate slight variations from baseline
+        # Simulate slight variations from baseline (each u[i] is uniform in [0, 1))
         return {
-            'typing_speed': baseline['typing_speed'] + random.uniform(-10, 10),
-            'mouse_consistency': baseline['mouse_consistency'] + random.uniform(-5, 5),
-            'session_duration': random.uniform(60, 300),
-            'click_count': random.randint(5, 50),
-            'scroll_depth': random.uniform(0.3, 0.9),
-            'is_robotic': random.random() < 0.15,  # 15% chance robotic
-            'timestamp': datetime.now().isoformat()
+            'typing_speed': baseline['typing_speed'] + u[0] * 20 - 10,
+            'mouse_consistency': baseline['mouse_consistency'] + u[1] * 10 - 5,
+            'session_duration': 60 + u[2] * 240,
+            'click_count': 5 + int(u[3] * 46),  # 5..50 inclusive
+            'scroll_depth': 0.3 + u[4] * 0.6,
+            'is_robotic': u[5] < 0.15,  # 15% chance robotic
+            'timestamp': _now()[2]
         }
     
     def get_device_data(self, user_id: str) -> Dict:
         """Get device fingerprint"""
         # Create deterministic device ID based on user_id
-        device_hash = hashlib.md5(user_id.encode()).hexdigest()[:16]
+        device_hash = _fingerprint(user_id)
         
         return {
             'device_id': f"device_{device_hash}",
@@ -144,18 +304,22 @@ class RealDataTracker:
         }
     
     def get_time_context(self) -> Dict:
-        """Get current time context"""
-        now = datetime.now()
+        """Get current time context (rebuilt at most once per second)"""
+        global _time_context
+        sec, now, iso = _now()
         
-        return {
-            'hour': now.hour,
-            'minute': now.minute,
-            'weekday': now.weekday(),  # 0=Monday
-            'is_night': 22 <= now.hour <= 23 or 0 <= now.hour <= 5,
-            'is_weekend': now.weekday() >= 5,
-            'timestamp': now.isoformat(),
-            'unix_timestamp': int(now.timestamp())
-        }
+        if _time_context[0] != sec:
+            _time_context = (sec, {
+                'hour': now.hour,
+                'minute': now.minute,
+                'weekday': now.weekday(),  # 0=Monday
+                'is_night': (_NIGHT_MASK >> now.hour) & 1 == 1,
+                'is_weekend': now.weekday() >= 5,
+                'timestamp': iso,
+                'unix_timestamp': sec
+            })
+        
+        return dict(_time_context[1])
 
 # Global tracker instance
 data_tracker = RealDataTracker()
\ No newline at end of file
@@ -1,26 +1,45 @@
 
 from datetime import datetime
+from bisect import bisect_right
+import numpy as np
+
+try:
+    from .explanation_engine import transaction_reasons
+except ImportError:  # imported from inside backend/ (main.py style)
+    from explanation_engine import transaction_reasons
 
 BLOCK_THRESHOLD = 80
 REVIEW_THRESHOLD = 50
+FRAUD_THRESHOLD = 90
+
+# Decision bands in ascending order; a score's band is the number of
+# thresholds it has reached, i.e. bisect_right(_BANDS, score)
+_DECISIONS = (
+    ("APPROVED", "Low risk transaction"),
+    ("REVIEW", "Needs manual review"),
+    ("BLOCK", "High risk transaction"),
+    ("FRAUD", "Fraud pattern detected"),
+)
+_BANDS = (REVIEW_THRESHOLD, BLOCK_THRESHOLD, FRAUD_THRESHOLD)
+
+# Batch decision codes -> labels (same bands as make_decision)
+DECISION_LABELS = tuple(label for label, _ in _DECISIONS)
+
+_BATCH_LABELS = np.array(DECISION_LABELS)
+_BATCH_REASONS = np.array([reason for _, reason in _DECISIONS])
 
 def update_policy(block_threshold=None, review_threshold=None):
-    global BLOCK_THRESHOLD, REVIEW_THRESHOLD
+    global BLOCK_THRESHOLD, REVIEW_THRESHOLD, _BANDS
     if block_threshold is not None:
         BLOCK_THRESHOLD = block_threshold
     if review_threshold is not None:
         REVIEW_THRESHOLD = review_threshold
+    # FRAUD is the top slice of BLOCK, so it never starts below the block threshold
+    _BANDS = (REVIEW_THRESHOLD, BLOCK_THRESHOLD, max(BLOCK_THRESHOLD, FRAUD_THRESHOLD))
     return {"block_threshold": BLOCK_THRESHOLD, "review_threshold": REVIEW_THRESHOLD}
 
 def make_decision(score):
-    if score >= BLOCK_THRESHOLD:
-        return "BLOCK", "High risk transaction"
-    elif score >= REVIEW_THRESHOLD:
-        return "REVIEW", "Needs manual review"
-    elif score >= 90:
-        return "FRAUD", "Fraud pattern detected"
-    else:
-        return "APPROVED", "Low risk transaction"
+    return _DECISIONS[bisect_right(_BANDS, score)]
 
 def calculate_final_risk(txn_risk, behavioural_risk, fraud_ring_risk):
     return round(
@@ -28,4 +47,58 @@ def calculate_final_risk(txn_risk, behavioural_risk, fraud_ring_risk):
         0.3 * behavioural_risk +
         0.3 * fraud_ring_risk,
         2
-    )
\ No newline at end of file
+    )
+
+def decide(txn_risk, behavioural_risk, fraud_ring_risk,
+           amount, distance_km, is_new_device, hour):
+    """Fused score -> decision -> reasons for a single transaction.
+
+    Returns (label, final_risk, reasons) in one call instead of chaining
+    calculate_final_risk, make_decision and the explanation rules.
+    """
+    score = round(0.4 * txn_risk + 0.3 * behavioural_risk + 0.3 * fraud_ring_risk, 2)
+    label = _DECISIONS[bisect_right(_BANDS, score)][0]
+    return label, score, transaction_reasons(amount, distance_km, is_new_device, hour)
+
+def _round2(scores):
+    """round(score, 2) for every element, matching Python's round exactly.
+
+    np.round scales by 100 and rints, which disagrees with round() when the
+    scaled value sits on a .5 tie; those few elements are redone in Python.
+    """
+    scaled = scores * 100
+    rounded = np.rint(scaled) / 100
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in near_tie.tolist():
+        rounded[i] = round(float(scores[i]), 2)
+    return rounded
+
+def calculate_final_risk_batch(txn_risk, behavioural_risk, fraud_ring_risk):
+    """Score many transactions at once.
+
+    Returns (scores, decision_codes); codes index into DECISION_LABELS.
+    Scores and bands match calculate_final_risk + make_decision element-wise.
+    """
+    txn = np.asarray(txn_risk, dtype=np.float64)
+    beh = np.asarray(behavioural_risk, dtype=np.float64)
+    ring = np.asarray(fraud_ring_risk, dtype=np.float64)
+
+    # Same operation order as calculate_final_risk, in float64
+    scores = _round2(0.4 * txn + 0.3 * beh + 0.3 * ring)
+    codes = np.searchsorted(np.array(_BANDS, dtype=np.float64), scores, side="right").astype(np.int8)
+    return scores, codes
+
+def score_batch(df):
+    """Score a DataFrame of transactions in one vectorised pass.
+
+    Expects txn_risk, beh_risk and ring_risk columns; returns a copy with
+    score, action and explanation (the make_decision reason) added.
+    """
+    scores, codes = calculate_final_risk_batch(
+        df["txn_risk"].to_numpy(), df["beh_risk"].to_numpy(), df["ring_risk"].to_numpy()
+    )
+    return df.assign(
+        score=scores,
+        action=np.take(_BATCH_LABELS, codes),
+        explanation=np.take(_BATCH_REASONS, codes)
+    )
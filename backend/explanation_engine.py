@@ -1,24 +1,41 @@
-def generate_explanation(tx, final_risk, action):
-    reasons = []
-
-    if tx.amount > 5000:
-        reasons.append("High transaction amount")
-
-    if tx.location_distance_km > 100:
-        reasons.append("Transaction from distant location")
-
-    if tx.is_new_device:
-        reasons.append("New device detected")
-
-    if tx.hour < 6 or tx.hour > 22:
-        reasons.append("Unusual transaction time")
+from operator import attrgetter
+
+REASON_TEXTS = (
+    "High transaction amount",
+    "Transaction from distant location",
+    "New device detected",
+    "Unusual transaction time",
+)
+_tx_fields = attrgetter("amount", "location_distance_km", "is_new_device", "hour")
+
+# Reasons encoded as a 4-bit mask (bit i <=> REASON_TEXTS[i]);
+# every possible mask maps to a prebuilt tuple of reason strings
+_REASONS_BY_MASK = tuple(
+    tuple(text for bit, text in enumerate(REASON_TEXTS) if mask >> bit & 1)
+    for mask in range(1 << len(REASON_TEXTS))
+)
+
+def transaction_reasons(amount, distance_km, is_new_device, hour):
+    """The one copy of the reason rules; shared with decision_engine.decide"""
+    mask = ((amount > 5000)
+            | (distance_km > 100) << 1
+            | bool(is_new_device) << 2
+            | (hour < 6 or hour > 22) << 3)
+    return _REASONS_BY_MASK[mask]
+
+def _transaction_reasons(tx):
+    return list(transaction_reasons(*_tx_fields(tx)))
 
+def generate_explanation(tx, final_risk, action):
+    """One-line explanation stored on Decision"""
+    reasons = _transaction_reasons(tx)
     reason_text = ", ".join(reasons) if reasons else "Normal behavior"
 
     return f"Decision: {action}. Risk Score: {final_risk}. Reasons: {reason_text}"
 
-def generate_explanation(decision_data):
-    explanation = {
+def generate_decision_breakdown(decision_data):
+    """Structured breakdown of a decision_engine decision dict"""
+    return {
         "final_decision": decision_data["decision"],
         "risk_breakdown": {
             "transaction_risk": decision_data["txn_risk"],
@@ -27,5 +44,3 @@ def generate_explanation(decision_data):
         },
         "key_reasons": decision_data["reasons"]
     }
-
-    return explanation
\ No newline at end of file
@@ -1,5 +1,9 @@
-from fastapi import Body
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Body, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from itertools import compress
+from typing import List
+import numpy as np
 from models import Transaction, Decision
 from risk_engine import (
     calculate_transaction_risk,
@@ -8,9 +12,33 @@ from risk_engine import (
 )
 from policy_engine import decide_action, update_policy
 from explanation_engine import generate_explanation
-from audit import log_decision, get_audit_log
-
-app = FastAPI(title="Explainable Banking Decision Engine")
+from audit import log_decision, get_audit_log, AuditWriter
+from batcher import MicroBatcher
+from response_cache import ResponseCache, cache_key
+from compat import json_dumps, model_dump
+
+class CompactJSONResponse(JSONResponse):
+    """Response bodies encoded by compat.json_dumps (orjson when installed)"""
+
+    def render(self, content) -> bytes:
+        return json_dumps(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background queue workers live as long as the app
+    evaluate_batcher.start()
+    audit_writer.start()
+    try:
+        yield
+    finally:
+        await evaluate_batcher.stop()
+        await audit_writer.stop()
+
+app = FastAPI(
+    title="Explainable Banking Decision Engine",
+    default_response_class=CompactJSONResponse,
+    lifespan=lifespan,
+)
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,9 +50,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoint groups; each router is mounted on the app at the bottom of the module
+scoring_router = APIRouter(tags=["scoring"])
+policy_router = APIRouter(prefix="/policy", tags=["policy"])
+audit_router = APIRouter(prefix="/audit", tags=["audit"])
+
+# Identical payloads within the TTL skip scoring; cleared when the policy changes
+simulate_cache = ResponseCache(maxsize=10_000, ttl=60)
+evaluate_cache = ResponseCache(maxsize=10_000, ttl=60)
 
-@app.post("/simulate", response_model=Decision)
+@scoring_router.post("/simulate", response_model=Decision)
 def simulate_transaction(tx: Transaction):
+    key = cache_key(model_dump(tx))
+    decision = simulate_cache.get(key)
+    if decision is not None:
+        log_decision(tx, decision)  # every request is still audited
+        return decision
+
     tr = calculate_transaction_risk(tx)
     br = calculate_behavioral_risk()
     fr = calculate_final_risk(tr, br)
@@ -40,44 +82,63 @@ def simulate_transaction(tx: Transaction):
         explanation=explanation
     )
 
+    simulate_cache.set(key, decision)
     log_decision(tx, decision)
     return decision
 
-from fastapi import Body
-@app.post("/evaluate")
-def evaluate(txn: dict = Body(...)):
-    risk_score = 0
-    reasons = []
-
-    if txn.get("amount", 0) > 50000:
-        risk_score += 30
-        reasons.append("High transaction amount")
-
-    if txn.get("velocity_24h", 0) > 5:
-        risk_score += 25
-        reasons.append("High transaction frequency")
-
-    if txn.get("otp_failures", 0) > 2:
-        risk_score += 20
-        reasons.append("Multiple OTP failures")
-
-    if txn.get("tenure_months", 0) < 3:
-        risk_score += 15
-        reasons.append("New customer")
-
-    return {
-        "risk_score": risk_score,
-        "reasons": reasons
-    }
+# /evaluate rules: a transaction scores the weight of every rule it trips
+_RULE_FIELDS = ("amount", "velocity_24h", "otp_failures", "tenure_months")
+_RULE_LIMITS = np.array([50000, 5, 2, 3], dtype=np.float64)
+_RULE_WEIGHTS = np.array([30, 25, 20, 15], dtype=np.int64)
+_RULE_REASONS = (
+    "High transaction amount",
+    "High transaction frequency",
+    "Multiple OTP failures",
+    "New customer",
+)
 
-from fastapi import Body
-@app.post("/policy/update")
+def _evaluate_batch(txns):
+    values = np.array(
+        [[txn.get(field, 0) for field in _RULE_FIELDS] for txn in txns],
+        dtype=np.float64,
+    ).reshape(-1, len(_RULE_FIELDS))
+
+    mask = values > _RULE_LIMITS
+    mask[:, 3] = values[:, 3] < _RULE_LIMITS[3]  # tenure trips when it is *below* the limit
+    scores = mask @ _RULE_WEIGHTS
+
+    return [
+        {"risk_score": score, "reasons": list(compress(_RULE_REASONS, tripped))}
+        for score, tripped in zip(scores.tolist(), mask.tolist())
+    ]
+
+# Concurrent /evaluate calls within ~3 ms are scored together
+evaluate_batcher = MicroBatcher(_evaluate_batch)
+
+# Records posted to /audit, appended to disk in batches
+audit_writer = AuditWriter()
+
+@scoring_router.post("/evaluate")
+async def evaluate(txn: dict = Body(...)):
+    key = cache_key(txn)
+    result = evaluate_cache.get(key)
+    if result is None:
+        result = await evaluate_batcher.submit(txn)
+        evaluate_cache.set(key, result)
+    return result
+
+@scoring_router.post("/evaluate_batch")
+def evaluate_batch(txns: List[dict] = Body(...)):
+    return _evaluate_batch(txns)
+
+@policy_router.post("/update")
 def change_policy(data: dict = Body(...)):
     low = data.get("low_threshold")
     review = data.get("review_threshold")
     block = data.get("block_threshold")
 
     update_policy(low, review, block)
+    simulate_cache.clear()  # cached actions were decided under the old thresholds
 
     return {
         "message": "Policy updated successfully",
@@ -88,18 +149,20 @@ def change_policy(data: dict = Body(...)):
         }
     }
 
-
-
-audit_logs = []
-
-@app.post("/audit")
-def save_audit(data: dict):
-    audit_logs.append(data)
+@audit_router.post("")
+async def save_audit(data: dict):
+    total = await audit_writer.put(data)
     return {
         "message": "Audit saved successfully",
-        "total_logs": len(audit_logs)
+        "total_logs": total
     }
 
-@app.get("/audit")
-def view_audit_log():
-    return audit_logs
+@audit_router.get("")
+async def view_audit_log():
+    await audit_writer.flush()
+    return StreamingResponse(audit_writer.iter_json_array(), media_type="application/json")
+
+app.include_router(scoring_router)
+app.include_router(policy_router)
+app.include_router(audit_router)
+
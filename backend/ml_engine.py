@@ -1,22 +1,250 @@
 
 import os
+import csv
+import time
+import atexit
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 import pandas as pd
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 
+# Optional multi-threaded CSV reader for retraining; pandas otherwise
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Optional compiled forest traversal for single-row predict; sklearn otherwise
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 DATA_FILE = os.path.join(DATA_DIR, "training_data.csv")
 MODEL_FILE = os.path.join(MODEL_DIR, "risk_model.pkl")
 
+FEATURE_COLUMNS = ("amount", "velocity", "location_risk", "behavior_score")
+DATA_COLUMNS = FEATURE_COLUMNS + ("label",)
+RELOAD_CHECK_INTERVAL = 1.0  # Seconds between model-file mtime checks in predict
+PENDING_FLUSH_ROWS = 32  # Training rows buffered in memory before one CSV append
+
+# Small, shallow forest: four features don't need 150 unbounded trees, and
+# predict walks every tree. Larger datasets get more trees, up to 128.
+MODEL_PARAMS = {
+    "n_estimators": 64,
+    "max_depth": 8,
+    "min_samples_leaf": 5,
+    "n_jobs": 1,
+    "random_state": 42,
+}
+SCALE_UP_ROWS = 5000
+MAX_ESTIMATORS = 128
+
+# predict's bands: BLOCK above 0.75, REVIEW above 0.45, else APPROVE
+_RISK_BANDS = np.array([0.45, 0.75])
+_ACTIONS = np.array(["APPROVE", "REVIEW", "BLOCK"])
+
+# Trees are fit in parallel, sharing the cores with the other web workers
+# (WEB_CONCURRENCY, as read by uvicorn/gunicorn). Serving stays at n_jobs=1.
+FIT_JOBS = max(1, (os.cpu_count() or 1) // max(1, int(os.environ.get("WEB_CONCURRENCY", "1"))))
+
+if njit is not None:
+    @njit(fastmath=True)
+    def _predict_forest(feature, threshold, left, right, leaf_prob, roots, x):
+        # Walk every tree from its root to a leaf and average the class-1 probability
+        total = 0.0
+        for root in roots:
+            node = root
+            while left[node] != -1:
+                if x[feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            total += leaf_prob[node]
+        return total / roots.size
+
+def _frame_arrays(df):
+    # Fit on plain arrays so predict can pass ndarray rows without name checks
+    return df[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float64), df["label"].to_numpy()
+
+def _read_training_data(data_file):
+    """(X, y) arrays from the training CSV"""
+    if pl is None:
+        return _frame_arrays(pd.read_csv(data_file))
+    # Fixed dtypes: polars otherwise infers from the first rows only and rejects
+    # a later float in a column that started out as integers
+    df = pl.read_csv(data_file, schema_overrides={c: pl.Float64 for c in FEATURE_COLUMNS})
+    X = df.select(list(FEATURE_COLUMNS)).to_numpy().astype(np.float64, copy=False)
+    return X, df["label"].to_numpy()
+
+def _fit_forest(X, y, params):
+    if len(X) > SCALE_UP_ROWS:
+        params = {**params, "n_estimators": min(MAX_ESTIMATORS, int(np.log2(len(X)) * 16))}
+
+    model = RandomForestClassifier(**{**params, "n_jobs": FIT_JOBS})
+    model.fit(X, y)
+    model.set_params(n_jobs=params.get("n_jobs", 1))  # single-row predict is faster unthreaded
+    return model
+
+def _forest_file(model_file):
+    # Flattened trees saved beside the pickle; see _save_forest
+    return os.path.splitext(model_file)[0] + "_forest.npy"
+
+def _replace_atomic(path, write):
+    # Write to a unique file beside the target and rename, so readers never see a
+    # half-written file and concurrent writers never share a temp file
+    fd, tmp_file = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+def _dump_atomic(model, model_file):
+    # The forest goes first: a reader reloads when the pickle's mtime changes.
+    # The pickle records the forest's digest so it is never paired with another's.
+    model.forest_digest_ = _save_forest(model, _forest_file(model_file))
+    _replace_atomic(model_file, lambda f: joblib.dump(model, f))
+
+def _make_trainer():
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+def _train_worker(data_file, model_file, params):
+    """Runs in the trainer process: fit on the CSV and atomically replace the model file"""
+    X, y = _read_training_data(data_file)
+    if len(X) < 5:
+        return 0
+    _dump_atomic(_fit_forest(X, y, params), model_file)
+    return len(X)
+
+# One record per tree node, across all trees; children are global node indices
+_NODE_DTYPE = np.dtype([
+    ("feature", np.int32),
+    ("threshold", np.float64),
+    ("left", np.int32),
+    ("right", np.int32),
+    ("prob", np.float64),  # class-1 probability at the node
+])
+
+def _positive_column(model):
+    if not hasattr(model, "classes_"):
+        return None
+    classes = list(model.classes_)
+    return classes.index(1) if 1 in classes else None
+
+def _flatten_forest(model, positive):
+    """Flatten the fitted forest into one node array for the compiled predictor"""
+    nodes = np.empty(sum(e.tree_.node_count for e in model.estimators_), dtype=_NODE_DTYPE)
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        block = nodes[offset:offset + tree.node_count]
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        inner = left != -1
+        left[inner] += offset
+        right[inner] += offset
+
+        value = tree.value[:, 0, :]
+        block["feature"] = tree.feature
+        block["threshold"] = tree.threshold
+        block["left"] = left
+        block["right"] = right
+        block["prob"] = value[:, positive] / value.sum(axis=1)
+        offset += tree.node_count
+    return nodes
+
+def _forest_digest(nodes):
+    return hashlib.blake2b(memoryview(np.ascontiguousarray(nodes)).cast("B"), digest_size=16).hexdigest()
+
+def _save_forest(model, forest_file):
+    """Write the flattened forest and return its digest (None when there is no forest)"""
+    positive = _positive_column(model)
+    if positive is None:
+        if os.path.exists(forest_file):
+            os.remove(forest_file)
+        return None
+    nodes = _flatten_forest(model, positive)
+    _replace_atomic(forest_file, lambda f: np.save(f, nodes))
+    return _forest_digest(nodes)
+
+def _load_forest(model, forest_file):
+    """Memory-map the saved node array read-only so every worker shares its pages"""
+    digest = getattr(model, "forest_digest_", None)
+    if digest is None:
+        return None
+    try:
+        nodes = np.load(forest_file, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    # A file written for another model (e.g. mid-swap) won't match the pickle's digest
+    if nodes.dtype != _NODE_DTYPE or nodes.ndim != 1 or _forest_digest(nodes) != digest:
+        return None
+    return nodes
+
+def _forest_arrays(nodes):
+    # Plain ndarray views over the node fields, plus each tree's root (a node no one points to)
+    left = np.asarray(nodes["left"])
+    right = np.asarray(nodes["right"])
+    is_root = np.ones(len(nodes), dtype=bool)
+    is_root[left[left != -1]] = False
+    is_root[right[right != -1]] = False
+    return (
+        np.asarray(nodes["feature"]), np.asarray(nodes["threshold"]),
+        left, right, np.asarray(nodes["prob"]),
+        np.flatnonzero(is_root).astype(np.int32),
+    )
+
+def _serving_state(model, forest_file=None):
+    """(model, forest, positive column, feature order) that predict reads as one unit"""
+    columns = tuple(getattr(model, "feature_names_in_", FEATURE_COLUMNS))
+    positive = _positive_column(model)
+    if positive is None or njit is None:
+        return model, None, positive, columns
+
+    nodes = _load_forest(model, forest_file) if forest_file else None
+    if nodes is None:
+        nodes = _flatten_forest(model, positive)  # private copy
+    forest = _forest_arrays(nodes)
+    _predict_forest(*forest, np.zeros(len(columns), dtype=np.float32))  # JIT warm-up
+    return model, forest, positive, columns
+
 class ContinuousMLEngine:
     def __init__(self):
         os.makedirs(DATA_DIR, exist_ok=True)
         os.makedirs(MODEL_DIR, exist_ok=True)
 
-        self.model = RandomForestClassifier(n_estimators=150, random_state=42)
+        self.model = RandomForestClassifier(**MODEL_PARAMS)
         self.is_trained = False
+        self._row_count = self._count_rows()  # Rows on disk plus rows still pending
+        self._pending = []  # Rows not yet appended to DATA_FILE
+        self._pending_lock = threading.Lock()
+        atexit.register(self.flush_pending)
+
+        # Everything predict needs, swapped in with one assignment so a reload
+        # never exposes a model with another model's forest or column order
+        self._serving = _serving_state(self.model)
+
+        # Retraining runs in a separate process; predict picks up the new file by mtime
+        self._trainer = _make_trainer()
+        self._training = None  # Future of the in-flight retrain, if any
+        self._retrain_pending = False  # Threshold hit while a retrain was running
+        self._model_mtime = None
+        self._next_reload_check = 0.0
 
         self.load_model()
         self.ensure_cold_start_model()
@@ -24,84 +252,176 @@ class ContinuousMLEngine:
     def load_model(self):
         if os.path.exists(MODEL_FILE):
             try:
-                self.model = joblib.load(MODEL_FILE)
-                self.is_trained = True
+                mtime = os.stat(MODEL_FILE).st_mtime_ns
+                # The pickle is loaded privately (sklearn copies tree nodes on unpickle);
+                # the flattened forest predict walks is memory-mapped and shared
+                self._publish(joblib.load(MODEL_FILE), _forest_file(MODEL_FILE))
+                self._model_mtime = mtime
                 print("✅ ML model loaded from disk")
             except Exception as e:
                 print("⚠️ Model load failed:", e)
 
+    def _publish(self, model, forest_file=None):
+        """Build the serving state off to the side, then swap it in"""
+        state = _serving_state(model, forest_file)
+        self.model = model
+        self._serving = state
+        self.is_trained = True
+
     def save_model(self):
-        joblib.dump(self.model, MODEL_FILE)
+        _dump_atomic(self.model, MODEL_FILE)
+        self._model_mtime = os.stat(MODEL_FILE).st_mtime_ns
         print("💾 ML model saved")
 
-    def ensure_cold_start_model(self):
+    def _reload_if_changed(self):
+        """Swap in a model file written by the trainer process (or another worker)"""
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + RELOAD_CHECK_INTERVAL
         try:
-            self.model.predict_proba(pd.DataFrame([self.default_features()]))
-            self.is_trained = True
-        except Exception:
-            print("⚠️ Cold start: training base ML model...")
-
-            X = pd.DataFrame([
-                {"amount": 100, "velocity": 0, "location_risk": 0, "behavior_score": 0},
-                {"amount": 500, "velocity": 1, "location_risk": 0, "behavior_score": 1},
-                {"amount": 20000, "velocity": 6, "location_risk": 4, "behavior_score": 7},
-                {"amount": 50000, "velocity": 10, "location_risk": 8, "behavior_score": 9},
-            ])
-            y = [0, 0, 1, 1]
-
-            self.model.fit(X, y)
+            mtime = os.stat(MODEL_FILE).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._model_mtime:
+            self.load_model()
+
+    def ensure_cold_start_model(self):
+        # A fitted estimator has classes_; no need to run the forest to find out
+        if hasattr(self.model, "classes_"):
             self.is_trained = True
-            self.save_model()
+            return
 
-            print("✅ Base ML model trained")
+        print("⚠️ Cold start: training base ML model...")
+
+        # Columns in FEATURE_COLUMNS order
+        X = np.array([
+            [100, 0, 0, 0],
+            [500, 1, 0, 1],
+            [20000, 6, 4, 7],
+            [50000, 10, 8, 9],
+        ], dtype=np.float64)
+        y = [0, 0, 1, 1]
+
+        # Four seed rows: leaves must be allowed to hold a single sample
+        model = RandomForestClassifier(**{**MODEL_PARAMS, "min_samples_leaf": 1})
+        model.fit(X, y)
+        self._publish(model)
+        self.save_model()
+
+        print("✅ Base ML model trained")
 
     def default_features(self):
         return {"amount": 100, "velocity": 0, "location_risk": 0, "behavior_score": 0}
 
-    def save_transaction(self, features, label):
-        row = {**features, "label": label}
+    def _count_rows(self):
+        # Read once at start-up; save_transaction keeps the count after that
+        if not os.path.exists(DATA_FILE):
+            return 0
+        with open(DATA_FILE, newline="") as f:
+            return max(0, sum(1 for _ in f) - 1)  # minus header
 
-        if os.path.exists(DATA_FILE):
-            df = pd.read_csv(DATA_FILE)
-            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        else:
-            df = pd.DataFrame([row])
-
-        df.to_csv(DATA_FILE, index=False)
-
-        if len(df) >= 10 and len(df) % 10 == 0:
-            self.retrain_model(df)
+    def save_transaction(self, features, label):
+        with self._pending_lock:
+            self._pending.append({**features, "label": label})
+            self._row_count += 1
+            row_count = self._row_count
+            flush = len(self._pending) >= PENDING_FLUSH_ROWS
+
+        if row_count >= 10 and row_count % 10 == 0:
+            self.retrain_in_background()  # flushes first
+        elif flush:
+            self.flush_pending()
+
+    def flush_pending(self):
+        """Append buffered rows to the CSV in one write; retraining calls this first"""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+
+            write_header = not os.path.exists(DATA_FILE) or os.path.getsize(DATA_FILE) == 0
+            with open(DATA_FILE, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=DATA_COLUMNS, lineterminator="\n")
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+
+    def retrain_in_background(self):
+        """Fit in the trainer process; queued once more if a retrain is already running"""
+        if self._training is not None and not self._training.done():
+            self._retrain_pending = True
+            return
+        self.flush_pending()
+        try:
+            self._training = self._trainer.submit(
+                _train_worker, DATA_FILE, MODEL_FILE, MODEL_PARAMS
+            )
+        except BrokenProcessPool as e:
+            print("⚠️ Trainer process pool was broken, restarting it:", e)
+            self._restart_trainer()
+            self._training = self._trainer.submit(
+                _train_worker, DATA_FILE, MODEL_FILE, MODEL_PARAMS
+            )
+        self._training.add_done_callback(self._on_trained)
+
+    def _restart_trainer(self):
+        broken, self._trainer = self._trainer, _make_trainer()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _on_trained(self, future):
+        try:
+            rows = future.result()
+        except BrokenProcessPool as e:
+            # The trainer process died (e.g. killed for memory); the next retrain gets a fresh one
+            print("⚠️ Background retrain failed, trainer process died:", e)
+            self._restart_trainer()
+            return
+        except Exception as e:
+            print("⚠️ Background retrain failed:", e)
+            return
+        if rows:
+            self._next_reload_check = 0.0  # reload on the next predict
+            print(f"🔄 ML retrained with {rows} samples")
+        if self._retrain_pending:
+            self._retrain_pending = False
+            self.retrain_in_background()
 
     def retrain_model(self, df=None):
         if df is None:
+            self.flush_pending()
             if not os.path.exists(DATA_FILE):
                 return
-            df = pd.read_csv(DATA_FILE)
+            X, y = _read_training_data(DATA_FILE)
+        else:
+            X, y = _frame_arrays(df)
 
-        if len(df) < 5:
+        if len(X) < 5:
             return
 
-        X = df.drop("label", axis=1)
-        y = df["label"]
-
-        self.model.fit(X, y)
-        self.is_trained = True
+        self._publish(_fit_forest(X, y, MODEL_PARAMS))
         self.save_model()
 
-        print(f"🔄 ML retrained with {len(df)} samples")
+        print(f"🔄 ML retrained with {len(X)} samples")
 
     def predict(self, features):
-        X = pd.DataFrame([features])
-
+        self._reload_if_changed()
         if not self.is_trained:
             return "APPROVE", 0.1
 
-        try:
-            risk_score = self.model.predict_proba(X)[0][1]
-        except Exception as e:
-            print("⚠️ ML prediction error:", e)
+        model, forest, positive, columns = self._serving  # read once; a reload may swap it
+        if positive is None:
+            # Model has only ever seen one class; there is no fraud probability to read
             return "APPROVE", 0.1
 
+        # Fresh row per call: predict may run from several threads at once
+        if forest is not None:
+            x = np.array([features[c] for c in columns], dtype=np.float32)
+            risk_score = _predict_forest(*forest, x)
+        else:
+            x = np.array([[features[c] for c in columns]], dtype=np.float64)
+            risk_score = model.predict_proba(x)[0, positive]
+
         if risk_score > 0.75:
             decision = "BLOCK"
         elif risk_score > 0.45:
@@ -109,7 +429,24 @@ class ContinuousMLEngine:
         else:
             decision = "APPROVE"
 
-        return decision, round(float(risk_score), 3)
+        return decision, float(risk_score)
+
+    def predict_batch(self, features_list):
+        """Score many feature dicts at once; returns (decision, risk_score) pairs like predict"""
+        self._reload_if_changed()
+        model, _, positive, columns = self._serving
+        if not self.is_trained or positive is None or not features_list:
+            return [("APPROVE", 0.1)] * len(features_list)
+
+        X = np.array(
+            [[features[c] for c in columns] for features in features_list],
+            dtype=np.float64,
+        )
+        scores = model.predict_proba(X)[:, positive]
+
+        # side="left" keeps predict's strict ">" at the band edges
+        decisions = _ACTIONS[np.searchsorted(_RISK_BANDS, scores, side="left")]
+        return list(zip(decisions.tolist(), scores.tolist()))
     
     def detect_vpn(self, ip_address=None, location=None):
         """
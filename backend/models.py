@@ -1,15 +1,29 @@
 from pydantic import BaseModel
 from typing import Optional
 
-class Transaction(BaseModel):
+# Immutable, strict request/response models: no per-instance mutation and
+# unknown fields are rejected. pydantic v2 uses model_config, v1 a Config class
+# (1.10 also exports ConfigDict, so check for the v2 API itself).
+if hasattr(BaseModel, "model_dump"):
+    from pydantic import ConfigDict
+
+    class _FrozenModel(BaseModel):
+        model_config = ConfigDict(frozen=True, extra="forbid")
+else:
+    class _FrozenModel(BaseModel):
+        class Config:
+            allow_mutation = False
+            extra = "forbid"
+
+class Transaction(_FrozenModel):
     amount: float
     location_distance_km: float
     is_new_device: bool
     hour: int   # 0–23
 
-class Decision(BaseModel):
+class Decision(_FrozenModel):
     transaction_risk: float
     behavioral_risk: float
     final_risk: float
     action: str
-    explanation: str
\ No newline at end of file
+    explanation: str
@@ -1,20 +1,30 @@
+from bisect import bisect_right
+import numpy as np
+
 policy = {
     "low_threshold": 30,
     "review_threshold": 60,
     "block_threshold": 85
 }
 
+# Ascending thresholds; decide_action picks the label for the band a score falls in
+_ACTIONS = ("APPROVED", "REVIEW", "BLOCK", "CRITICAL_FRAUD")
+_THRESHOLDS = (policy["low_threshold"], policy["review_threshold"], policy["block_threshold"])
+_ACTION_ARRAY = np.array(_ACTIONS)
+_THRESHOLD_ARRAY = np.array(_THRESHOLDS, dtype=np.float64)
+
 def update_policy(low, review, block):
+    global _THRESHOLDS, _THRESHOLD_ARRAY
     policy["low_threshold"] = low
     policy["review_threshold"] = review
     policy["block_threshold"] = block
+    _THRESHOLDS = (low, review, block)
+    _THRESHOLD_ARRAY = np.array(_THRESHOLDS, dtype=np.float64)
 
 def decide_action(risk_score):
-    if risk_score >= policy["block_threshold"]:
-        return "CRITICAL_FRAUD"
-    elif risk_score >= policy["review_threshold"]:
-        return "BLOCK"
-    elif risk_score >= policy["low_threshold"]:
-        return "REVIEW"
-    else:
-        return "APPROVED"
+    return _ACTIONS[bisect_right(_THRESHOLDS, risk_score)]
+
+def decide_actions(risk_scores):
+    """Vectorized decide_action: one searchsorted over the batch, then a label gather"""
+    bands = np.searchsorted(_THRESHOLD_ARRAY, np.asarray(risk_scores, dtype=np.float64), side="right")
+    return _ACTION_ARRAY[bands].tolist()
@@ -0,0 +1,53 @@
+"""
+TRACE BANK - RESPONSE CACHE
+In-process TTL + LRU cache for deterministic scoring endpoints,
+keyed on a hash of the canonical JSON payload
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    from .compat import json_dumps
+except ImportError:  # imported from inside backend/ (main.py style)
+    from compat import json_dumps
+
+def cache_key(payload) -> bytes:
+    """16-byte digest of the payload; equal dicts give equal keys regardless of key order"""
+    return hashlib.blake2b(json_dumps(payload, sort_keys=True), digest_size=16).digest()
+
+class ResponseCache:
+    """Thread-safe LRU bounded by maxsize whose entries expire ttl seconds after insert"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: bytes, value: Any):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -4,23 +4,66 @@ Generates deterministic synthetic data for fraud ring and behavioral anomaly sce
 Feeds synthetic data through actual ML pipeline for demonstration/testing
 """
 
-import random
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, Set, Tuple
+from functools import lru_cache
+from collections import defaultdict
 import numpy as np
 
+@lru_cache(maxsize=8192)
+def _md5_hex(s: str) -> str:
+    # Only for pure per-user derivations; a bounded set of ids repeats across requests
+    return hashlib.md5(s.encode()).hexdigest()
+
+# Constant display text, built once and shared by every scenario response
+_ANOMALY_INDICATORS: Dict[str, Tuple[str, ...]] = {
+    'robotic': (
+        "Typing speed indicates automated input",
+        "Mouse movement pattern is too consistent",
+        "Session duration abnormally short",
+        "Behavior matches known bot patterns",
+    ),
+    'unusual_timing': (
+        "Transaction timing outside normal user hours",
+        "Session duration abnormally long",
+        "Erratic interaction patterns detected",
+    ),
+    'device_mismatch': (
+        "Device fingerprint does not match history",
+        "New device detected for this account",
+        "Browser/OS combination unusual for user",
+    ),
+}
+
+_FRAUD_RING_ACTIONS = (
+    "Flag all ring members for manual review",
+    "Freeze suspicious accounts pending investigation",
+    "Alert fraud investigation team",
+    "Document evidence chain for potential legal action",
+)
+
+_BEHAVIORAL_ANOMALY_ACTIONS = (
+    "Require additional authentication",
+    "Send verification to registered phone/email",
+    "Flag for behavioral analysis review",
+    "Monitor subsequent transactions closely",
+)
+
 class ScenarioEngine:
     """
     Generates synthetic behavior patterns for fraud detection scenarios.
     Only used for fraud_ring and behavioral_anomaly scenarios, NOT normal transactions.
     """
     
-    def __init__(self):
+    def __init__(self, seed=None):
+        # One generator for all synthetic draws; pass a seed for repeatable scenarios
+        self._rng = np.random.default_rng(seed)
+
         # Fraud ring state - persists across calls to build up ring patterns
         self.fraud_ring_members = {}  # ring_id -> list of user data
-        self.shared_devices = {}  # device_id -> list of user_ids
-        self.shared_ips = {}  # ip -> list of user_ids
+        self.shared_devices: Dict[str, Set[str]] = defaultdict(set)  # device_id -> user_ids
+        self.shared_ips: Dict[str, Set[str]] = defaultdict(set)  # ip -> user_ids
         
         # Behavioral anomaly patterns
         self.anomaly_patterns = {
@@ -56,18 +99,21 @@ class ScenarioEngine:
         Returns enhanced transaction data with fraud ring synthetic patterns.
         """
         # Create a deterministic ring ID based on the scenario
-        ring_id = f"ring_{hashlib.md5(base_user_id.encode()).hexdigest()[:8]}"
+        ring_id = f"ring_{_md5_hex(base_user_id)[:8]}"
         
         # Generate ring members (5-8 synthetic users)
-        ring_size = random.randint(5, 8)
+        ring_size = int(self._rng.integers(5, 9))
         
         # Shared device and IP for the ring
-        shared_device_id = f"device_fraud_{hashlib.md5(ring_id.encode()).hexdigest()[:12]}"
-        shared_ip = f"192.168.{random.randint(1, 255)}.{random.randint(1, 255)}"
+        shared_device_id = f"device_fraud_{_md5_hex(ring_id)[:12]}"
+        octets = self._rng.integers(1, 256, size=2).tolist()
+        shared_ip = f"192.168.{octets[0]}.{octets[1]}"
         
         # Generate synthetic ring members with roles
         ring_members = []
         role_distribution = {}
+        now = datetime.now()
+        join_days = self._rng.integers(1, 31, size=ring_size).tolist()
         
         for i in range(ring_size):
             member_id = f"ring_member_{ring_id}_{i}"
@@ -81,17 +127,14 @@ class ScenarioEngine:
                 'role': role,
                 'device_id': shared_device_id,
                 'ip_address': shared_ip,
-                'join_date': (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat()
+                'join_date': (now - timedelta(days=join_days[i])).isoformat()
             })
         
         # Store in shared tracking
-        if shared_device_id not in self.shared_devices:
-            self.shared_devices[shared_device_id] = []
-        self.shared_devices[shared_device_id].extend([m['user_id'] for m in ring_members])
-        
-        if shared_ip not in self.shared_ips:
-            self.shared_ips[shared_ip] = []
-        self.shared_ips[shared_ip].extend([m['user_id'] for m in ring_members])
+        # Sets: re-generating a ring does not count its members twice
+        member_ids = [m['user_id'] for m in ring_members]
+        self.shared_devices[shared_device_id].update(member_ids)
+        self.shared_ips[shared_ip].update(member_ids)
         
         # Calculate confidence based on patterns
         confidence = self._calculate_ring_confidence(ring_size, len(role_distribution))
@@ -108,8 +151,8 @@ class ScenarioEngine:
                 'role_density': role_distribution,
                 'confidence': confidence,
                 'ring_members': ring_members,
-                'shared_device_users': len(self.shared_devices.get(shared_device_id, [])),
-                'shared_ip_users': len(self.shared_ips.get(shared_ip, []))
+                'shared_device_users': len(self.shared_devices[shared_device_id]),
+                'shared_ip_users': len(self.shared_ips[shared_ip])
             }
         }
         
@@ -123,16 +166,20 @@ class ScenarioEngine:
         Returns enhanced transaction data with anomaly patterns.
         """
         # Randomly select anomaly type
-        anomaly_type = random.choice(['robotic', 'unusual_timing', 'device_mismatch'])
+        anomaly_types = ('robotic', 'unusual_timing', 'device_mismatch')
+        anomaly_type = anomaly_types[self._rng.integers(len(anomaly_types))]
         anomaly_pattern = self.anomaly_patterns[anomaly_type]
         
+        # Jitter for typing speed, mouse consistency, session duration and scroll depth in one draw
+        jitter = self._rng.uniform((-5, -3, -10, 0.3), (5, 3, 10, 0.9)).tolist()
+        
         # Generate synthetic behavior data
         synthetic_behavior = {
-            'typing_speed': anomaly_pattern['typing_speed'] + random.uniform(-5, 5),
-            'mouse_consistency': anomaly_pattern['mouse_consistency'] + random.uniform(-3, 3),
-            'session_duration': anomaly_pattern['session_duration'] + random.uniform(-10, 10),
-            'click_count': random.randint(2, 100) if anomaly_type == 'robotic' else random.randint(10, 30),
-            'scroll_depth': 0.1 if anomaly_type == 'robotic' else random.uniform(0.3, 0.9),
+            'typing_speed': anomaly_pattern['typing_speed'] + jitter[0],
+            'mouse_consistency': anomaly_pattern['mouse_consistency'] + jitter[1],
+            'session_duration': anomaly_pattern['session_duration'] + jitter[2],
+            'click_count': int(self._rng.integers(2, 101) if anomaly_type == 'robotic' else self._rng.integers(10, 31)),
+            'scroll_depth': 0.1 if anomaly_type == 'robotic' else jitter[3],
             'is_robotic': anomaly_pattern['is_robotic'],
             'timestamp': datetime.now().isoformat()
         }
@@ -142,11 +189,11 @@ class ScenarioEngine:
         
         # Device data for device_mismatch scenario
         device_data = {
-            'device_id': f"device_anomaly_{hashlib.md5(user_id.encode()).hexdigest()[:12]}",
+            'device_id': f"device_anomaly_{_md5_hex(user_id)[:12]}",
             'is_new_device': anomaly_pattern.get('new_device', False),
             'user_agent': 'Mozilla/5.0 (Anomaly Test)',
             'screen_resolution': '1920x1080',
-            'fingerprint': hashlib.md5(f"{user_id}_anomaly".encode()).hexdigest()[:16]
+            'fingerprint': _md5_hex(f"{user_id}_anomaly")[:16]
         }
         
         # Enhanced transaction data with anomaly info
@@ -159,7 +206,7 @@ class ScenarioEngine:
                 'anomaly_type': anomaly_type,
                 'anomaly_score': anomaly_score,
                 'anomaly_indicators': self._get_anomaly_indicators(anomaly_type, synthetic_behavior),
-                'detection_confidence': min(95, anomaly_score + random.uniform(0, 10))
+                'detection_confidence': min(95, anomaly_score + float(self._rng.uniform(0, 10)))
             }
         }
         
@@ -177,7 +224,7 @@ class ScenarioEngine:
         sharing_factor = 25
         
         # Random variance
-        variance = random.uniform(-5, 5)
+        variance = float(self._rng.uniform(-5, 5))
         
         confidence = size_factor + role_factor + sharing_factor + variance
         return round(min(99, max(50, confidence)), 1)
@@ -208,27 +255,11 @@ class ScenarioEngine:
         elif anomaly_type == 'unusual_timing':
             score += 5
         
-        return round(min(95, score + random.uniform(0, 10)), 1)
+        return round(min(95, score + float(self._rng.uniform(0, 10))), 1)
     
-    def _get_anomaly_indicators(self, anomaly_type: str, behavior: Dict) -> List[str]:
+    def _get_anomaly_indicators(self, anomaly_type: str, behavior: Dict) -> Tuple[str, ...]:
         """Get human-readable anomaly indicators"""
-        indicators = []
-        
-        if anomaly_type == 'robotic':
-            indicators.append("Typing speed indicates automated input")
-            indicators.append("Mouse movement pattern is too consistent")
-            indicators.append("Session duration abnormally short")
-            indicators.append("Behavior matches known bot patterns")
-        elif anomaly_type == 'unusual_timing':
-            indicators.append("Transaction timing outside normal user hours")
-            indicators.append("Session duration abnormally long")
-            indicators.append("Erratic interaction patterns detected")
-        elif anomaly_type == 'device_mismatch':
-            indicators.append("Device fingerprint does not match history")
-            indicators.append("New device detected for this account")
-            indicators.append("Browser/OS combination unusual for user")
-        
-        return indicators
+        return _ANOMALY_INDICATORS.get(anomaly_type, ())
     
     def get_fraud_ring_analysis(self, scenario_metadata: Dict) -> Dict:
         """
@@ -251,12 +282,7 @@ class ScenarioEngine:
                 f"Shared device across {scenario_metadata.get('shared_device_users', 0)} users",
                 f"Shared IP address across {scenario_metadata.get('shared_ip_users', 0)} users"
             ],
-            'recommended_actions': [
-                "Flag all ring members for manual review",
-                "Freeze suspicious accounts pending investigation",
-                "Alert fraud investigation team",
-                "Document evidence chain for potential legal action"
-            ]
+            'recommended_actions': _FRAUD_RING_ACTIONS
         }
     
     def get_behavioral_anomaly_analysis(self, scenario_metadata: Dict) -> Dict:
@@ -278,12 +304,7 @@ class ScenarioEngine:
                 'feature_count': 5,
                 'contamination_rate': '10%'
             },
-            'recommended_actions': [
-                "Require additional authentication",
-                "Send verification to registered phone/email",
-                "Flag for behavioral analysis review",
-                "Monitor subsequent transactions closely"
-            ]
+            'recommended_actions': _BEHAVIORAL_ANOMALY_ACTIONS
         }
 
 
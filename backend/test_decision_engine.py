@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""Test that the batch scorer matches calculate_final_risk + make_decision"""
+
+import random
+import numpy as np
+from decision_engine import (
+    DECISION_LABELS, _round2, calculate_final_risk, calculate_final_risk_batch, make_decision
+)
+
+def _scalar(txn, beh, ring):
+    score = calculate_final_risk(txn, beh, ring)
+    return score, make_decision(score)[0]
+
+def _check(txn, beh, ring):
+    scores, codes = calculate_final_risk_batch(txn, beh, ring)
+    for i, (t, b, r) in enumerate(zip(txn, beh, ring)):
+        score, label = _scalar(t, b, r)
+        assert scores[i] == score, (t, b, r, scores[i], score)
+        assert DECISION_LABELS[codes[i]] == label, (t, b, r, DECISION_LABELS[codes[i]], label)
+
+def test_round2_matches_round_on_ties():
+    # x.xx5 values sit on (or within an ulp of) a tie once scaled by 100
+    values = [0.125, 0.135, 2.675, 1.005, 124.985, 124.995, 49.995, 79.995, 89.995]
+    values += [i / 1000 for i in range(5, 100_000, 10)]
+    rounded = _round2(np.array(values))
+    for value, got in zip(values, rounded.tolist()):
+        assert got == round(value, 2), (value, got)
+
+def test_batch_matches_scalar_on_random_scores():
+    rng = random.Random(7)
+    n = 20_000
+    txn = [rng.uniform(0, 100) for _ in range(n)]
+    beh = [rng.uniform(0, 100) for _ in range(n)]
+    ring = [rng.uniform(0, 100) for _ in range(n)]
+    _check(txn, beh, ring)
+
+def test_batch_matches_scalar_on_two_decimal_inputs():
+    # Two-decimal risks make the weighted sum land on .5 ties and on the band edges
+    rng = random.Random(11)
+    n = 20_000
+    txn = [rng.randrange(0, 10_001) / 100 for _ in range(n)]
+    beh = [rng.randrange(0, 10_001) / 100 for _ in range(n)]
+    ring = [rng.randrange(0, 10_001) / 100 for _ in range(n)]
+    _check(txn, beh, ring)
+
+def test_batch_band_edges():
+    # Exactly 50, 80 and 90 fall in the upper band, as bisect_right does
+    edges = [50.0, 80.0, 90.0, 49.99, 79.99, 89.99, 124.99, 0.0]
+    _check(edges, edges, edges)
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
+    print("\n✅ All decision engine tests passed!")
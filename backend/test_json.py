@@ -1,10 +1,10 @@
 #!/usr/bin/env python
 """Test JSON serialization of responses"""
 
-import json
 import asyncio
 from datetime import datetime
 from fastapi.responses import JSONResponse
+from compat import json_dumps, json_loads
 
 # Simulate the response
 test_response = {
@@ -50,17 +50,17 @@ test_response = {
         'device_trust': 'KNOWN',
         'time_context': 'NORMAL'
     },
-    'timestamp': datetime.now().isoformat()
+    'timestamp': datetime.now()
 }
 
 # Test JSON serialization
 try:
-    json_str = json.dumps(test_response)
+    json_str = json_dumps(test_response).decode()
     print("✅ JSON serialization successful!")
     print(f"Response size: {len(json_str)} bytes")
     
     # Try to parse it back
-    parsed = json.loads(json_str)
+    parsed = json_loads(json_str)
     print("✅ JSON parsing successful!")
     print(f"Amount: {parsed['amount_inr']}")
     print(f"Risk Score: {parsed['risk_score']}")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Test that the compiled forest predictor matches sklearn's predict_proba"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import ml_engine
+from ml_engine import (
+    FEATURE_COLUMNS, MODEL_PARAMS, _fit_forest, _flatten_forest, _forest_arrays,
+    _load_forest, _positive_column, _save_forest
+)
+
+def _training_frame(rng, n):
+    X = pd.DataFrame({
+        "amount": rng.uniform(0, 50_000, n),
+        "velocity": rng.integers(0, 10, n).astype(np.float64),
+        "location_risk": rng.integers(0, 9, n).astype(np.float64),
+        "behavior_score": rng.integers(0, 10, n).astype(np.float64),
+    }, columns=list(FEATURE_COLUMNS))
+    y = ((X["amount"] > 25_000) ^ (rng.random(n) < 0.2)).astype(int)
+    return X, y
+
+def _kernel_probs(forest, X):
+    rows = X.to_numpy(dtype=np.float32)
+    return np.array([ml_engine._predict_forest(*forest, x) for x in rows])
+
+def test_flattened_forest_matches_predict_proba():
+    if ml_engine.njit is None:
+        print("⏭️ numba not installed, compiled predictor not used")
+        return
+    rng = np.random.default_rng(5)
+    X, y = _training_frame(rng, 2_000)
+    model = _fit_forest(X, y, MODEL_PARAMS)
+    positive = _positive_column(model)
+    forest = _forest_arrays(_flatten_forest(model, positive))
+
+    X_test, _ = _training_frame(rng, 1_000)
+    expected = model.predict_proba(X_test)[:, positive]
+    assert np.allclose(_kernel_probs(forest, X_test), expected, rtol=0, atol=1e-9)
+
+def test_saved_forest_is_paired_with_its_model():
+    if ml_engine.njit is None:
+        return
+    rng = np.random.default_rng(9)
+    X, y = _training_frame(rng, 500)
+    model = _fit_forest(X, y, MODEL_PARAMS)
+    other = _fit_forest(X, y, {**MODEL_PARAMS, "random_state": 7})
+
+    forest_file = os.path.join(tempfile.mkdtemp(), "m_forest.npy")
+    model.forest_digest_ = _save_forest(model, forest_file)
+    other.forest_digest_ = _save_forest(other, os.path.join(os.path.dirname(forest_file), "o_forest.npy"))
+
+    nodes = _load_forest(model, forest_file)
+    assert nodes is not None
+    expected = model.predict_proba(X)[:, _positive_column(model)]
+    assert np.allclose(_kernel_probs(_forest_arrays(nodes), X), expected, rtol=0, atol=1e-9)
+    # Another model's pickle must not pick up this forest
+    assert _load_forest(other, forest_file) is None
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
+    print("\n✅ All ML engine tests passed!")
@@ -1,12 +1,12 @@
 
 import pandas as pd
-from ml_engine import ContinuousMLEngine
+from ml_engine import ContinuousMLEngine, FEATURE_COLUMNS
 
 engine = ContinuousMLEngine()
 
 df = pd.read_csv("data/training_data.csv")
 
-X = df.drop("label", axis=1)
+X = df[list(FEATURE_COLUMNS)].to_numpy()
 y = df["label"]
 
 engine.model.fit(X, y)